@@ -0,0 +1,456 @@
+"""
+Precomputed analytics tables for the NHL Stats Dashboard.
+
+Everything here is computed once at load time with vectorized NumPy operations
+so callbacks only slice ready-made arrays.
+"""
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+FILTER_TERM = re.compile(r'^\{(?P<column>[^}]+)\}\s*(?P<operator>[is]?(?:[<>!]=?|=)|[a-z]+)\s*(?P<value>.*)$')
+FILTER_OPERATORS = {'=': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+
+
+def exact_values(df, stats):
+    """
+    Return stats as float64, with compact float32 stats rounded back to their exact decimal values.
+
+    Args:
+        df (pd.DataFrame): data with the decimals of its float32 stats in df.attrs['decimals'].
+        stats (list): stat columns.
+
+    Returns:
+        pd.DataFrame: the stats as float64, on the same index
+    """
+    stats = list(stats)
+    decimals = df.attrs.get('decimals', {})
+    values = df[stats].to_numpy(dtype='float64')
+    for places in set(decimals.get(stat) for stat in stats) - {None}:
+        cols = [i for i, stat in enumerate(stats) if decimals.get(stat) == places]
+        values[:, cols] = values[:, cols].round(places)
+    return pd.DataFrame(values, index=df.index, columns=stats)
+
+
+def add_derived_stats(df, specs):
+    """
+    Return the data with every derived metric added as a column.
+
+    Rates, ratios and shares are computed for every row with whole-column
+    NumPy operations; situation splits then copy a stat from each player's row
+    for that situation onto their situation=='all' row (NaN on other rows).
+
+    Args:
+        df (pd.DataFrame): DataFrame of all player data.
+        specs (dict): derived metric name -> definition (see config.derived_stats).
+
+    Returns:
+        pd.DataFrame: the data with one extra column per derived metric
+    """
+    derived = {}
+    decimals = df.attrs.get('decimals', {})
+
+    def column(stat):
+        if stat in derived:
+            return derived[stat]
+        # compact float32 stats are rounded back to their exact values first
+        values = df[stat].to_numpy(dtype='float64')
+        return values.round(decimals[stat]) if stat in decimals else values
+
+    icetime = column('icetime')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, spec in specs.items():
+            scale = spec.get('scale', 1)
+            if spec['kind'] == 'per60':
+                values = column(spec['stat']) * 3600 / icetime
+            elif spec['kind'] == 'ratio':
+                values = column(spec['numerator']) / column(spec['denominator']) * scale
+            elif spec['kind'] == 'share':
+                numerator = column(spec['numerator'])
+                values = numerator / (numerator + column(spec['other'])) * scale
+            else:
+                continue
+            derived[name] = np.where(np.isfinite(values), values, np.nan)
+
+    splits = {name: spec for name, spec in specs.items() if spec['kind'] == 'split'}
+    if splits:
+        player_ids = df['playerId'].to_numpy()
+        situations = df['situation'].to_numpy()
+        is_all = situations == 'all'
+        for situation in {spec['situation'] for spec in splits.values()}:
+            rows = np.flatnonzero(situations == situation)
+            # row of the same player in this situation, for each situation=='all' row
+            source = pd.Index(player_ids[rows]).get_indexer(player_ids[is_all])
+            found = source >= 0
+            for name, spec in splits.items():
+                if spec['situation'] != situation:
+                    continue
+                values = np.full(len(df), np.nan)
+                target = np.flatnonzero(is_all)[found]
+                values[target] = column(spec['stat'])[rows[source[found]]] * spec.get('scale', 1)
+                derived[name] = values
+
+    # add columns one by one: concat would consolidate (copy) the memory-mapped stat block
+    result = df.copy(deep=False)
+    for name in specs:
+        result[name] = derived[name]
+    return result
+
+
+class Leaderboards:
+    """
+    Top-k player IDs for every stat, per position tab and situation.
+
+    Built in one pass over the numeric stat columns: for each (position, situation)
+    group the top k rows of every stat are found with a single argpartition over
+    the whole stat matrix, then only those k rows are sorted.
+
+    Args:
+        df (pd.DataFrame): DataFrame of all player data.
+        stats (list): numeric stat columns to rank.
+        positions (dict): position tab -> position code in the data, None for all skaters.
+        size (int): number of leaders kept per stat.
+    """
+
+    def __init__(self, df, stats, positions, size):
+        self.stats = list(stats)
+        self.stat_index = {stat: i for i, stat in enumerate(self.stats)}
+        self.size = size
+        self.tables = {}
+        self.counts = {}
+
+        values = df[self.stats].to_numpy(dtype='float64', na_value=np.nan)
+        known = ~np.isnan(values)
+        values = np.where(known, values, -np.inf)
+        player_ids = df['playerId'].to_numpy()
+        situations = df['situation'].to_numpy()
+        codes = df['position'].to_numpy()
+
+        for situation in np.unique(situations):
+            in_situation = situations == situation
+            for tab, code in positions.items():
+                mask = in_situation if code is None else in_situation & (codes == code)
+                self.tables[(tab, situation)] = self._top_k(player_ids[mask], values[mask])
+                # NaNs rank last as -inf; leaders are cut at the number of known values
+                self.counts[(tab, situation)] = known[mask].sum(axis=0)
+        self.nbytes = sum(table.nbytes + self.counts[key].nbytes for key, table in self.tables.items())
+
+    def _top_k(self, player_ids, values):
+        k = min(self.size, len(player_ids))
+        if k == 0:
+            return np.empty((len(self.stats), 0), dtype=player_ids.dtype)
+        # column-wise top k (descending), then sort just those k rows
+        top = np.argpartition(-values, k - 1, axis=0)[:k]
+        top_values = np.take_along_axis(values, top, axis=0)
+        order = np.argsort(-top_values, axis=0, kind='stable')
+        return player_ids[np.take_along_axis(top, order, axis=0)].T
+
+    def top(self, position, stat, n, situation='all'):
+        """
+        Return the IDs of the top players of a position for a stat.
+
+        Players without a value for the stat are never leaders.
+
+        Args:
+            position (str): position tab (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+            stat (str): stat to rank by.
+            n (int): number of players, at most the leaderboard size.
+            situation (str): game situation (e.g., 'all', '5on5').
+
+        Returns:
+            list: player IDs, best first
+        """
+        table = self.tables[(position, situation)]
+        col = self.stat_index[stat]
+        return table[col, :min(n, self.counts[(position, situation)][col])].tolist()
+
+
+class RankTables:
+    """
+    League-wide and per-position rank and percentile of every player for every stat.
+
+    Computed once per season over the situation=='all' rows with column-wise
+    ranking, and stored as dense arrays aligned with the chart frame rows so a
+    lookup is two dictionary hits and an array index. Rank 1 is the highest
+    value; the percentile is the share of players at or below the player.
+
+    Args:
+        frame (pd.DataFrame): chart frame of all skaters, indexed by playerId.
+        stats (list): stats to rank.
+    """
+
+    def __init__(self, frame, stats):
+        self.stats = list(stats)
+        self.stat_index = {stat: i for i, stat in enumerate(self.stats)}
+        self.rows = {player_id: i for i, player_id in enumerate(frame.index.tolist())}
+        self.ids = frame.index.to_numpy()
+        self.id_order = np.argsort(self.ids, kind='stable')
+        self.positions = frame['position'].to_numpy()
+
+        values = frame[self.stats]
+        by_position = values.groupby(frame['position'], observed=True)
+        self.league_rank = values.rank(ascending=False, method='min').to_numpy(dtype='float32')
+        self.league_percentile = values.rank(pct=True, method='max').to_numpy(dtype='float32')
+        self.position_rank = by_position.rank(ascending=False, method='min').to_numpy(dtype='float32')
+        self.position_percentile = by_position.rank(pct=True, method='max').to_numpy(dtype='float32')
+        self.league_count = values.count().to_numpy()
+        self.position_count = {position: group.count().to_numpy() for position, group in by_position}
+        self.nbytes = sys.getsizeof(self.rows) + sum(array.nbytes for array in (
+            self.ids, self.id_order, self.positions, self.league_rank, self.league_percentile,
+            self.position_rank, self.position_percentile))
+
+    def lookup(self, player_id, stat):
+        """
+        Return a player's rank and percentile for a stat.
+
+        Args:
+            player_id (int): player ID
+            stat (str): stat name
+
+        Returns:
+            dict: rank, percentile and count, league-wide and within the player's position
+        """
+        row, col = self.rows[player_id], self.stat_index[stat]
+        return {
+            'rank': self.league_rank[row, col],
+            'percentile': self.league_percentile[row, col],
+            'count': self.league_count[col],
+            'position_rank': self.position_rank[row, col],
+            'position_percentile': self.position_percentile[row, col],
+            'position_count': self.position_count[self.positions[row]][col],
+        }
+
+    def gather(self, player_ids, stats):
+        """
+        Return the rows and league percentiles of many players for a few stats.
+
+        One sorted search finds every player's row and one fancy index reads
+        the percentiles, however many players are asked for. Unknown IDs are
+        dropped.
+
+        Args:
+            player_ids (list): player IDs
+            stats (list): stat names
+
+        Returns:
+            np.ndarray: rows of the known players in the frame the tables were built from,
+            np.ndarray: their percentiles, one row per player and one column per stat
+        """
+        ids = np.asarray(player_ids, dtype=self.ids.dtype)
+        found = self.id_order[np.searchsorted(self.ids, ids, sorter=self.id_order).clip(0, len(self.ids) - 1)]
+        rows = found[self.ids[found] == ids]
+        cols = [self.stat_index[stat] for stat in stats]
+        return rows, self.league_percentile[np.ix_(rows, cols)]
+
+
+def parse_filter_query(filter_query):
+    """
+    Split a DataTable filter_query into (column, operator, value) terms.
+
+    Handles the expressions the DataTable filter row produces: terms joined by
+    '&&', each '{column} operator value'. Case prefixes, on words and symbols
+    alike ('icontains', 'seq', 's>', 'i<='), are folded into a
+    case_sensitive flag.
+
+    Args:
+        filter_query (str): filter expression from the DataTable.
+
+    Returns:
+        list: (column, operator, value, case_sensitive) tuples
+    """
+    terms = []
+    for part in (filter_query or '').split(' && '):
+        match = FILTER_TERM.match(part.strip())
+        if not match:
+            continue
+        operator = match['operator']
+        case_sensitive = True
+        if operator[0] in 'is' and (operator[1:] in FILTER_OPERATORS or operator[1:] in ('eq', 'ne', 'lt', 'le', 'gt', 'ge', 'contains')):
+            case_sensitive, operator = operator[0] == 's', operator[1:]
+        operator = FILTER_OPERATORS.get(operator, operator)
+        value = match['value'].strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'`':
+            value = value[1:-1]
+        terms.append((match['column'], operator, value, case_sensitive))
+    return terms
+
+
+class StatsTable:
+    """
+    Server-side paging, sorting and filtering over every player and stat.
+
+    Each column's row order is sorted once at load time, so a page request is a
+    boolean filter mask, one take from the pre-sorted order and a slice; only the
+    visible rows are ever turned into records.
+
+    Args:
+        frame (pd.DataFrame): chart frame of all skaters, indexed by playerId.
+        text_columns (list): text columns shown before the stats.
+        stats (list): numeric stat columns.
+    """
+
+    def __init__(self, frame, text_columns, stats):
+        self.text_columns = list(text_columns)
+        self.stats = list(stats)
+        self.text = {col: frame[col].astype(object).fillna('').to_numpy(dtype='U') for col in self.text_columns}
+        self.text_lower = {col: np.char.lower(values) for col, values in self.text.items()}
+        self.values = frame[self.stats].to_numpy(dtype='float64', na_value=np.nan)
+        self.stat_index = {stat: i for i, stat in enumerate(self.stats)}
+
+        # ascending row order per column; NaNs sort last and stay last when descending
+        self.orders = {col: np.argsort(values, kind='stable').astype('int32') for col, values in self.text.items()}
+        self.nan_counts = {}
+        order = np.argsort(self.values, axis=0, kind='stable').astype('int32')
+        for stat, i in self.stat_index.items():
+            self.orders[stat] = np.ascontiguousarray(order[:, i])
+            self.nan_counts[stat] = int(np.isnan(self.values[:, i]).sum())
+        self.nbytes = self.values.nbytes + sum(array.nbytes for arrays in (self.text, self.text_lower, self.orders) for array in arrays.values())
+
+    def __len__(self):
+        return len(self.values)
+
+    def _sorted_rows(self, column, descending):
+        order = self.orders.get(column)
+        if order is None:
+            return np.arange(len(self), dtype='int32')
+        if not descending:
+            return order
+        valid = len(order) - self.nan_counts.get(column, 0)
+        return np.concatenate([order[:valid][::-1], order[valid:]])
+
+    def _term_mask(self, column, operator, value, case_sensitive):
+        if column in self.text:
+            values = self.text[column] if case_sensitive else self.text_lower[column]
+            value = value if case_sensitive else value.lower()
+            if operator == 'contains':
+                return np.char.find(values, value) >= 0
+            if operator == 'eq':
+                return values == value
+            if operator == 'ne':
+                return values != value
+            return None
+        if column not in self.stat_index:
+            return None
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+        values = self.values[:, self.stat_index[column]]
+        comparisons = {
+            'eq': np.equal, 'contains': np.equal, 'ne': np.not_equal,
+            'lt': np.less, 'le': np.less_equal, 'gt': np.greater, 'ge': np.greater_equal,
+        }
+        if operator not in comparisons:
+            return None
+        return comparisons[operator](values, value)
+
+    def filter_mask(self, filter_query):
+        """
+        Return the rows matching a DataTable filter_query.
+
+        Terms on unknown columns, operators or values are ignored.
+
+        Args:
+            filter_query (str): filter expression from the DataTable.
+
+        Returns:
+            np.ndarray: boolean mask over the rows, None if nothing is filtered
+        """
+        mask = None
+        for term in parse_filter_query(filter_query):
+            term_mask = self._term_mask(*term)
+            if term_mask is not None:
+                mask = term_mask if mask is None else mask & term_mask
+        return mask
+
+    def page(self, page_current, page_size, sort_by=None, filter_query=''):
+        """
+        Return one page of the table.
+
+        Args:
+            page_current (int): zero-based page number.
+            page_size (int): rows per page.
+            sort_by (list): DataTable sort_by; only the first column is used.
+            filter_query (str): filter expression from the DataTable.
+
+        Returns:
+            list: records of the visible rows, int: number of matching rows
+        """
+        sort_by = sort_by or []
+        if sort_by:
+            rows = self._sorted_rows(sort_by[0]['column_id'], sort_by[0]['direction'] == 'desc')
+        else:
+            rows = self._sorted_rows(None, False)
+        mask = self.filter_mask(filter_query)
+        if mask is not None:
+            rows = rows[mask[rows]]
+
+        start = (page_current or 0) * page_size
+        window = rows[start:start + page_size]
+        columns = {col: self.text[col][window].tolist() for col in self.text_columns}
+        values = np.round(self.values[window], 3)
+        for stat, i in self.stat_index.items():
+            columns[stat] = [None if np.isnan(value) else value for value in values[:, i].tolist()]
+        records = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        return records, len(rows)
+
+
+def team_rollup(df, stats, methods, position, skaters_on_ice):
+    """
+    Return one row per team and situation with every stat rolled up from the players.
+
+    Stats are summed unless methods says otherwise: 'weighted' is an
+    ice-time-weighted average (rates and percentages), 'max' and 'mean' are
+    plain reductions. Each reduction is one grouped, vectorized pass. The
+    result has the same columns as the player data, with the team as the
+    name and a small team number as the playerId, so derived stats, chart
+    frames and leaderboards are built from it exactly as for players.
+
+    Ice time is the team's time on ice rather than the sum over its skaters:
+    the summed skater time of each situation is divided by the skaters the
+    team has on the ice in it, and the 'all' row is the sum of those splits,
+    so team per-60 rates are per 60 minutes the team played.
+
+    Args:
+        df (pd.DataFrame): DataFrame of all player data.
+        stats (list): numeric stats to roll up.
+        methods (dict): stat -> 'weighted', 'max' or 'mean'; other stats are summed.
+        position (str): position label given to every team row.
+        skaters_on_ice (dict): situation -> skaters the team has on the ice.
+
+    Returns:
+        pd.DataFrame: team rollups for every situation
+    """
+    keys = [df['team'], df['situation']]
+    data = exact_values(df, stats)
+    by_method = {}
+    for stat in stats:
+        by_method.setdefault(methods.get(stat, 'sum'), []).append(stat)
+
+    parts = []
+    for method, columns in by_method.items():
+        if method == 'weighted':
+            values = data[columns]
+            weights = values.notna().mul(data['icetime'], axis=0)
+            totals = values.mul(data['icetime'], axis=0).groupby(keys, observed=True).sum(min_count=1)
+            parts.append(totals / weights.groupby(keys, observed=True).sum().replace(0, np.nan))
+        else:
+            parts.append(data[columns].groupby(keys, observed=True).agg(method))
+    rollup = pd.concat(parts, axis=1)[list(stats)].reset_index()
+    rollup[['team', 'situation']] = rollup[['team', 'situation']].astype(str)
+
+    if 'icetime' in rollup:
+        on_ice = rollup['situation'].map(skaters_on_ice)
+        rollup['icetime'] /= on_ice
+        splits = rollup[on_ice.notna() & (rollup['situation'] != 'all')]
+        is_all = rollup['situation'] == 'all'
+        team_icetime = splits.groupby('team')['icetime'].sum(min_count=1)
+        rollup.loc[is_all, 'icetime'] = rollup.loc[is_all, 'team'].map(team_icetime).fillna(rollup.loc[is_all, 'icetime'])
+
+    rollup.insert(0, 'playerId', pd.factorize(rollup['team'], sort=True)[0])
+    rollup.insert(2, 'name', rollup['team'])
+    rollup.insert(3, 'position', position)
+    return rollup
@@ -1,20 +1,44 @@
-from dash import Dash, html, dcc, Input, Output, Patch, clientside_callback, callback
-import plotly.express as px
-import plotly.io as pio
+from dash import html, dcc, Input, Output, State, clientside_callback
 import dash_bootstrap_components as dbc
-from dash_bootstrap_templates import load_figure_template
-from utilities import load_data, format_stat_name, create_tab_content, create_player_callback, create_sidebar, create_sidebar_callback
-from config import skater_stats, teams_color
+from utilities import create_player_callback, create_player_selection_callback, create_sidebar, create_sidebar_callback, create_tab_render_callback, render_tab_content, create_clientside_player_callback, create_chart_data_callback, create_leaderboard_callback, create_similar_players_callback, create_stats_table_callback, create_comparison_panel, create_comparison_callbacks
+from data_store import SeasonStore, format_season
+from response_cache import ResponseCache, create_backend, make_key
+from layout_cache import CachedLayoutDash, get_source_digest
+from image_cache import ImageCache, register_image_routes
+from instrumentation import register_metrics, enable_profiler
+from config import chart_stats, response_cache_size, response_cache_ttl, response_cache_backend, response_cache_path, response_cache_disk_size, response_cache_redis_url, position_tabs, season_data_dir, season_memory_budget_mb, clientside_charts, image_cache_path, image_cache_max_mb, image_offline, image_fetch_timeout, profiler_enabled, profiler_interval_ms, profiler_slow_ms, profiler_path, layout_snapshot_path, layout_sources, data_reload_interval, team_tab
+
+# Seasons load lazily; only the latest one is read at startup
+season_store = SeasonStore(season_data_dir, season_memory_budget_mb)
+season_store.get(season_store.latest)
+response_cache = ResponseCache(response_cache_size, response_cache_ttl, create_backend(response_cache_backend, response_cache_path, response_cache_disk_size, response_cache_redis_url))
+
+
+def get_layout_version(dataset):
+    # The layout snapshot is only reused for the same data, seasons and code
+    return make_key(dataset.version, season_store.seasons, get_source_digest(layout_sources))
 
-# Load data with error handling
-file_path = 'data/skaters.csv'
-df = load_data(file_path)
 
 # Initialize dash app with bootstrap theme
-load_figure_template(['minty','minty_dark'])
-app = Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.MINTY, dbc.icons.FONT_AWESOME])
+app = CachedLayoutDash(
+    __name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.MINTY, dbc.icons.FONT_AWESOME],
+    static_layout=True, layout_snapshot=layout_snapshot_path, layout_version=get_layout_version(season_store.get()))
 server = app.server
-app.title = 'NHL Player Stats - 23-24'
+app.title = 'NHL Player Stats'
+
+
+# Mugshots and logos are proxied through a local disk cache
+register_image_routes(server, ImageCache(image_cache_path, image_cache_max_mb, image_offline, image_fetch_timeout))
+
+# Callback timings and sizes at /metrics
+register_metrics(server, {'response_cache': response_cache.stats})
+if profiler_enabled:
+    enable_profiler(profiler_interval_ms / 1000, profiler_slow_ms / 1000, profiler_path)
+
+
+@server.route('/cache-stats')
+def cache_stats():
+    return response_cache.stats()
 
 
 #color switcher
@@ -27,91 +51,155 @@ color_mode_switch =  html.Span(
     ]
 )
 
+#season selector
+def season_selector(dataset):
+    return html.Div(
+        dcc.Dropdown(
+            id='season-dropdown',
+            options=season_store.season_options(),
+            value=dataset.season,
+            clearable=False,
+            persistence=True),
+        className='col-2 mx-auto mb-2')
+
 
-# Filter data for each position
-df_c = df[df['position'] == 'C']
-df_lw = df[df['position'] == 'L']
-df_rw = df[df['position'] == 'R']
-df_d = df[df['position'] == 'D']
+# Position tab ids and the position each one shows
+tab_positions = {'C': 'C', 'RW': 'RW', 'LW': 'LW', 'D': 'D', 'A': 'All Skaters', 'TM': team_tab}
+# Positions with a chart: every position tab plus the team rollups
+chart_positions = [*position_tabs, team_tab]
+active_tab = 'C'
 
 
-# Filter data for each position and select top 10 based on key stats
-top_a = df.groupby('name').sum().reset_index().nlargest(100, 'I_F_points')['name'].tolist()
-top_c = df_c.groupby('name').sum().reset_index().nlargest(100, 'I_F_points')['name'].tolist()
-top_rw = df_rw.groupby('name').sum().reset_index().nlargest(100, 'I_F_points')['name'].tolist()
-top_lw = df_lw.groupby('name').sum().reset_index().nlargest(100, 'I_F_points')['name'].tolist()
-top_d = df_d.groupby('name').sum().reset_index().nlargest(100, 'I_F_points')['name'].tolist()
+def tab_body(tab_id, dataset):
+    # Only the active tab is rendered up front; the others render on first open
+    position = tab_positions[tab_id]
+    children = render_tab_content(app, position, chart_stats, dataset) if tab_id == active_tab else None
+    return html.Div(children, id=f'{position.lower()}-tab-body')
 
 
 
 # Create HTML Components
-app.layout = dbc.Container([html.Div([
-    color_mode_switch,
-    #create_sidebar('Robert Grathwohl'),
-    # Dashboard section
-    html.Div([
-        html.H1(f'NHL Player Stats 2023-2024', className='text-center'),
-         
+def build_layout():
+    # Built on first use (or read from the deploy-time snapshot), not at import
+    dataset = season_store.get()
+    return dbc.Container([html.Div([
+        color_mode_switch,
+        #create_sidebar('Robert Grathwohl'),
+        # Dashboard section
         html.Div([
-            create_sidebar('Robert Grathwohl'),
-            #html.Div(className='col-2 col-xl-2'),
-            html.H2('Players Stats by Position', className='text-center mb-4'),
+            html.H1(f'NHL Player Stats {format_season(dataset.season)}', id='dashboard-title', className='text-center'),
+            season_selector(dataset),
+         
             html.Div([
+                create_sidebar('Robert Grathwohl'),
+                #html.Div(className='col-2 col-xl-2'),
+                html.H2('Players Stats by Position', className='text-center mb-4'),
+                html.Div([
                 
-                dbc.Tabs(
-                    id='position-tabs',
-                    active_tab='C',
-                    class_name='d-flex justify-content-center w-100',
-                    children=[
-                        dbc.Tab(
-                            label='Centers',
-                            tab_id='C',
-                            children=create_tab_content(app, 'C', skater_stats, top_c, df_c)
-                        ),
-                        dbc.Tab(
-                            label='Right Wingers',
-                            tab_id='RW',
-                            children=create_tab_content(app, 'RW', skater_stats, top_rw, df_rw)
-                        ),
-                        dbc.Tab(
-                            label='Left Wingers',
-                            tab_id='LW',
-                            children=create_tab_content(app, 'LW', skater_stats, top_lw, df_lw)
-                        ),
-                        dbc.Tab(
-                            label='Defenseman',
-                            tab_id='D',
-                            children=create_tab_content(app, 'D', skater_stats, top_d, df_d)
-                        ),
-                        dbc.Tab(
-                            label='All Skaters',
-                            tab_id='A',
-                            children=create_tab_content(app, 'All Skaters', skater_stats, top_a, df)
-                        )
-                ])
-            ], className='col-10', style={'textAlign': 'center'}),
-        ], className='row')
-    ]),
-    html.Footer([
-        html.Div([
-            html.A('Author: Robby G', href='https://github.com/robbygrathwohl'),
-            html.Span('    |    '),
-            html.A('Dataset Source - MoneyPuck', href='https://moneypuck.com/moneypuck/playerData/seasonSummary/2023/regular/skaters.csv')
-        ], className='bg-dark text-light text-center py-3 fs-5')
-    ])
-])], fluid=True)
+                    dcc.Store(id='rendered-tabs', data=[active_tab]),
+                    # season and color mode the embedded default charts were built for
+                    dcc.Store(id='layout-view', data={'season': dataset.season, 'theme': True}),
+                    dcc.Store(id='view-sync'),
+                    dcc.Store(id='chart-data'),
+                    dbc.Tabs(
+                        id='position-tabs',
+                        active_tab=active_tab,
+                        class_name='d-flex justify-content-center w-100',
+                        children=[
+                            dbc.Tab(
+                                label='Centers',
+                                tab_id='C',
+                                children=tab_body('C', dataset)
+                            ),
+                            dbc.Tab(
+                                label='Right Wingers',
+                                tab_id='RW',
+                                children=tab_body('RW', dataset)
+                            ),
+                            dbc.Tab(
+                                label='Left Wingers',
+                                tab_id='LW',
+                                children=tab_body('LW', dataset)
+                            ),
+                            dbc.Tab(
+                                label='Defenseman',
+                                tab_id='D',
+                                children=tab_body('D', dataset)
+                            ),
+                            dbc.Tab(
+                                label='All Skaters',
+                                tab_id='A',
+                                children=tab_body('A', dataset)
+                            ),
+                            dbc.Tab(
+                                label='Teams',
+                                tab_id='TM',
+                                children=tab_body('TM', dataset)
+                            ),
+                            dbc.Tab(
+                                label='Stats Table',
+                                tab_id='T',
+                                children=html.Div(id='stats-table-tab-body')
+                            )
+                    ]),
+                    create_comparison_panel()
+                ], className='col-10', style={'textAlign': 'center'}),
+            ], className='row')
+        ]),
+        html.Footer([
+            html.Div([
+                html.A('Author: Robby G', href='https://github.com/robbygrathwohl'),
+                html.Span('    |    '),
+                html.A('Dataset Source - MoneyPuck', href='https://moneypuck.com/moneypuck/playerData/seasonSummary/2023/regular/skaters.csv')
+            ], className='bg-dark text-light text-center py-3 fs-5')
+        ])
+    ])], fluid=True)
+
+
+app.layout = build_layout
+
+
+def on_seasons_refreshed(swapped):
+    # responses built from the old data are stale
+    response_cache.clear()
+    # the layout lists every season and shows the latest one
+    app.layout_version = get_layout_version(season_store.get())
+    app.reset_layout()
 
 
+# Refreshed data files are reloaded in the background (under gunicorn, by the master; see gunicorn.conf.py)
+season_store.add_listener(on_seasons_refreshed)
+
 
 # Player stats by position line charts callback
-create_player_callback(app, 'C', df_c)
-create_player_callback(app, 'RW', df_rw)
-create_player_callback(app, 'LW', df_lw)
-create_player_callback(app, 'D', df_d)
-create_player_callback(app, 'All Skaters', df)
+if clientside_charts:
+    create_chart_data_callback(app, season_store)
+for position in chart_positions:
+    if clientside_charts:
+        create_clientside_player_callback(app, position)
+    else:
+        create_player_callback(app, position, season_store, response_cache)
+
+# Leaderboard of the y-axis stat for each position
+for position in chart_positions:
+    create_leaderboard_callback(app, position, season_store)
+
+# Player dropdowns follow the season and the top players selector
+for position in chart_positions:
+    create_player_selection_callback(app, position, season_store)
+
+# Full stats table pages
+create_stats_table_callback(app, season_store)
+
+# Render position and stats table tabs on first open
+create_tab_render_callback(app, tab_positions, 'T', chart_stats, season_store)
 
 # Update player card sidebar callback
-create_sidebar_callback(app, df.loc[df['situation']=='all'])
+create_sidebar_callback(app, season_store, response_cache)
+create_similar_players_callback(app, season_store)
+
+# Compare players selected on any chart
+create_comparison_callbacks(app, season_store)
 
 
 
@@ -127,7 +215,34 @@ clientside_callback(
     Input("color-mode-switch", "value"),
 )
 
+# Charts arrive pre-drawn and skip their initial callbacks; if the browser restored another
+# season or color mode, view-sync makes the rendered charts and leaderboards catch up
+clientside_callback(
+    """
+    (view, season, switchOn) => (view.season === season && view.theme === switchOn) ? window.dash_clientside.no_update : Date.now()
+    """,
+    Output('view-sync', 'data'),
+    Input('layout-view', 'data'),
+    [State('season-dropdown', 'value'),
+     State('color-mode-switch', 'value')],
+)
+
+clientside_callback(
+    """
+    (season) => {
+       const title = `NHL Player Stats ${season}-${season + 1}`;
+       document.title = title;
+       return title
+    }
+    """
+    ,
+    Output('dashboard-title', 'children'),
+    Input('season-dropdown', 'value'),
+)
+
 
 
 if __name__ == '__main__':
+    if data_reload_interval:
+        season_store.start_watcher(data_reload_interval)
     app.run_server(debug=True)
\ No newline at end of file
@@ -0,0 +1,73 @@
+// Clientside scatter charts, used when config.clientside_charts is on.
+// The season's stats are fetched once from /chart-data/<season>.json
+// (utilities.build_chart_payload, revalidated by ETag); every axis, player
+// and theme change is rendered here without a round trip.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    charts: {
+        load: function (season) {
+            return fetch('/chart-data/' + season + '.json')
+                .then((response) => response.ok ? response.json() : window.dash_clientside.no_update);
+        },
+        scatter: function (statX, statY, players, switchOn, data, chartId) {
+            if (!data) {
+                return window.dash_clientside.no_update;
+            }
+            const chart = data.charts[chartId.position];
+            const frame = data.frames[chart.frame];
+            if (!frame._columns) {
+                frame._columns = {};
+                frame._rows = new Map(frame.ids.map((id, i) => [id, i]));
+            }
+            // float32 stats are rounded back to their decimals, giving the exact values the server charts
+            const column = (stat) => {
+                if (!frame._columns[stat]) {
+                    const bytes = Uint8Array.from(atob(frame.stats[stat]), (c) => c.charCodeAt(0));
+                    const places = frame.decimals[stat];
+                    if (places === undefined) {
+                        frame._columns[stat] = new Float64Array(bytes.buffer);
+                    } else {
+                        const scale = 10 ** places;
+                        frame._columns[stat] = Float64Array.from(new Float32Array(bytes.buffer), (v) => Math.round(v * scale) / scale);
+                    }
+                }
+                return frame._columns[stat];
+            };
+
+            const rows = (players || []).map((id) => frame._rows.get(id)).filter((i) => i !== undefined).sort((a, b) => a - b);
+            const xs = column(statX);
+            const ys = column(statY);
+            const theme = switchOn ? data.themes.dark : data.themes.light;
+            const labelX = data.labels[statX];
+            const labelY = data.labels[statY];
+
+            return {
+                data: [{
+                    type: rows.length > data.glThreshold ? 'scattergl' : 'scatter',
+                    mode: 'markers',
+                    name: '',
+                    x: rows.map((i) => xs[i]),
+                    y: rows.map((i) => ys[i]),
+                    meta: rows.map((i) => frame.ids[i]),
+                    text: rows.map((i) => frame.names[i]),
+                    hovertemplate: '<b>%{text}</b><br>' + labelX + ' : %{x}<br>' + labelY + ' : %{y}',
+                    marker: {
+                        color: rows.map((i) => frame.teams[i]),
+                        colorscale: data.colorscale,
+                        cmin: -0.5,
+                        cmax: data.cmax,
+                        showscale: false,
+                        size: 10,
+                        line: {width: 1}
+                    }
+                }],
+                layout: {
+                    title: {text: chart.title + ' - ' + labelX + ' vs ' + labelY, font: {color: theme.font_color}},
+                    plot_bgcolor: theme.plot_bgcolor,
+                    paper_bgcolor: theme.paper_bgcolor,
+                    xaxis: {title: {text: labelX, font: {color: theme.font_color}}},
+                    yaxis: {title: {text: labelY, font: {color: theme.font_color}}}
+                }
+            };
+        }
+    }
+});
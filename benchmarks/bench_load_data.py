@@ -0,0 +1,61 @@
+"""
+Compare startup cost of parsing the skaters CSV against loading the columnar cache.
+
+Each path runs in a fresh interpreter so the timings include a cold import of
+the loader and the reported RSS is the whole process, like a gunicorn worker boot.
+
+    python benchmarks/bench_load_data.py [data/seasons/2023/skaters.csv] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import json, resource, time
+start = time.perf_counter()
+import pandas as pd
+from data_cache import load_cache
+df = {loader}({path!r})
+df['{probe}'].sum()
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def run_once(loader, path):
+    code = SNIPPET.format(loader=loader, path=path, probe='I_F_points')
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench(loader, path, runs):
+    results = [run_once(loader, path) for _ in range(runs)]
+    return {
+        'median_seconds': statistics.median(r['seconds'] for r in results),
+        'median_max_rss_mb': statistics.median(r['max_rss_mb'] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', nargs='?', default='data/seasons/2023/skaters.csv')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # warm the cache so the benchmark measures loads, not the one-off build
+    subprocess.run([sys.executable, 'data_cache.py', args.path], cwd=ROOT, check=True, capture_output=True)
+
+    results = {
+        'csv': bench('pd.read_csv', args.path, args.runs),
+        'cache': bench('load_cache', args.path, args.runs),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
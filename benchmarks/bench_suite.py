@@ -0,0 +1,261 @@
+"""
+Benchmark suite for data loading, callbacks and layout serialization.
+
+Synthetic seasons are built by replicating data/seasons/2023/skaters.csv 1x to
+100x (new player IDs, jittered stats), and every scale is measured in fresh
+interpreters:
+
+    load_data.cold          first load of the CSV, including the columnar cache build
+    load_data.warm          load from an existing columnar cache
+    app.import              `import app`, which loads the latest season and builds its tables
+    layout.tab              create_tab_content for All Skaters (time and JSON bytes)
+    layout.page             the whole serialized layout (JSON and gzip bytes)
+    update_chart.*          chart callback per player-set size and stat pair, response cache cleared
+    update_chart.*.cached   the same request served from the response cache
+    sidebar.click           player card callback for a clicked point
+
+Results are written as JSON and can be compared against a stored baseline;
+the exit status is 1 when a metric regressed by more than the tolerance.
+
+    python benchmarks/bench_suite.py [--scales 1,10,100] [--runs 5]
+        [--output results.json] [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+        [--min-delta-ms 1] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, 'data', 'seasons', '2023', 'skaters.csv')
+WORK_DIR = os.path.join(ROOT, 'data', '.cache', 'bench')
+SEASON = 2023
+PLAYER_COUNTS = [1, 10, 100, 'all']
+STAT_PAIRS = [('I_F_goals', 'I_F_points'), ('icetime', 'gameScore'), ('I_F_xGoals', 'onIce_xGoalsPercentage')]
+ID_OFFSET = 10_000_000
+
+
+def make_synthetic(scale):
+    data_dir = os.path.join(WORK_DIR, f'x{scale}')
+    path = os.path.join(data_dir, str(SEASON), 'skaters.csv')
+    if os.path.isfile(path):
+        return data_dir, path
+
+    df = pd.read_csv(SOURCE)
+    stats = [col for col in df.columns if df[col].dtype.kind == 'f']
+    rng = np.random.default_rng(scale)
+    copies = []
+    for k in range(scale):
+        copy = df.copy()
+        if k:
+            copy['playerId'] += k * ID_OFFSET
+            copy['name'] = copy['name'] + f' {k}'
+            copy[stats] = copy[stats] * rng.uniform(0.9, 1.1, size=(len(copy), len(stats)))
+        copies.append(copy)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.concat(copies, ignore_index=True).to_csv(f'{path}.tmp', index=False)
+    os.replace(f'{path}.tmp', path)
+    return data_dir, path
+
+
+def summarize(samples, **extra):
+    samples = sorted(samples)
+    return {
+        'median_ms': statistics.median(samples) * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'runs': len(samples),
+        **extra,
+    }
+
+
+def run_worker(args):
+    # runs in a fresh interpreter: point the app at the synthetic data before importing it
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import config
+    config.season_data_dir = args.data_dir
+    config.response_cache_backend = None
+    config.image_offline = True
+    config.image_cache_path = os.path.join(WORK_DIR, 'images')
+    results = {}
+
+    start = time.perf_counter()
+    import app
+    results['app.import'] = summarize([time.perf_counter() - start])
+
+    from dash._utils import to_json
+    from config import chart_stats
+    from utilities import render_tab_content, get_chart_id
+    dataset = app.season_store.get()
+
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        tab = render_tab_content(app.app, 'All Skaters', chart_stats, dataset)
+        samples.append(time.perf_counter() - start)
+    results['layout.tab'] = summarize(samples, bytes=len(to_json(tab)))
+    payload = app.app.get_layout_payload()
+    results['layout.page'] = {'bytes': len(payload['body']), 'gzip_bytes': len(payload['gzip_body'])}
+
+    client = app.server.test_client()
+    position, prefix = 'All Skaters', 'all skaters'
+    chart_id = get_chart_id(position)
+    chart_key = json.dumps(chart_id, sort_keys=True, separators=(',', ':'))
+    all_ids = dataset.position_ids(position).tolist()
+
+    def post_chart(stat_x, stat_y, players):
+        body = {
+            'output': f'..{chart_key}.figure...{prefix}-chart-state.data..',
+            'outputs': [{'id': chart_id, 'property': 'figure'}, {'id': f'{prefix}-chart-state', 'property': 'data'}],
+            'inputs': [
+                {'id': f'{prefix}-stat-dropdown-x', 'property': 'value', 'value': stat_x},
+                {'id': f'{prefix}-stat-dropdown-y', 'property': 'value', 'value': stat_y},
+                {'id': f'{prefix}-player-dropdown', 'property': 'value', 'value': players},
+                {'id': 'color-mode-switch', 'property': 'value', 'value': True},
+                {'id': 'season-dropdown', 'property': 'value', 'value': dataset.season},
+                {'id': 'view-sync', 'property': 'data', 'value': None},
+            ],
+            'state': [{'id': f'{prefix}-chart-state', 'property': 'data', 'value': None}],
+            'changedPropIds': [],
+        }
+        start = time.perf_counter()
+        response = client.post('/_dash-update-component', json=body)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.data[:500]
+        return elapsed, len(response.data)
+
+    for count in PLAYER_COUNTS:
+        players = all_ids if count == 'all' else dataset.leaderboards.top(position, 'I_F_points', count)
+        for stat_x, stat_y in STAT_PAIRS:
+            name = f'update_chart.players={count}.{stat_x}-{stat_y}'
+            samples = []
+            for _ in range(args.runs):
+                app.response_cache.clear()
+                elapsed, size = post_chart(stat_x, stat_y, players)
+                samples.append(elapsed)
+            results[name] = summarize(samples, bytes=size)
+            results[f'{name}.cached'] = summarize([post_chart(stat_x, stat_y, players)[0] for _ in range(args.runs)])
+
+    samples = []
+    for player_id in all_ids[:args.runs]:
+        body = {
+            'output': '..player_name.children...player_card_team.src...player_card_mug.src...player_card_stats.children..',
+            'outputs': [{'id': 'player_name', 'property': 'children'}, {'id': 'player_card_team', 'property': 'src'},
+                        {'id': 'player_card_mug', 'property': 'src'}, {'id': 'player_card_stats', 'property': 'children'}],
+            'inputs': [[{'id': {'type': 'player-chart', 'position': 'c'}, 'property': 'clickData', 'value': {'points': [{'meta': player_id}]}}]],
+            'state': [{'id': 'season-dropdown', 'property': 'value', 'value': dataset.season}],
+            'changedPropIds': [json.dumps({'position': 'c', 'type': 'player-chart'}, separators=(',', ':')) + '.clickData'],
+        }
+        start = time.perf_counter()
+        response = client.post('/_dash-update-component', json=body)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:500]
+    results['sidebar.click'] = summarize(samples)
+
+    print(json.dumps(results))
+
+
+def run_python(args):
+    out = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+    if out.returncode:
+        sys.exit(out.stderr)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def run_load(path, runs, cold):
+    code = (
+        'import json, shutil, time\n'
+        'from data_cache import get_cache_root\n'
+        'from utilities import load_data\n'
+        f'if {cold}: shutil.rmtree(get_cache_root({path!r}), ignore_errors=True)\n'
+        'start = time.perf_counter()\n'
+        f'load_data({path!r})\n'
+        'print(time.perf_counter() - start)\n'
+    )
+    samples = []
+    for _ in range(runs):
+        samples.append(float(run_python(['-c', code])))
+    return summarize(samples)
+
+
+def run_scale(scale, runs):
+    data_dir, path = make_synthetic(scale)
+    results = {
+        'load_data.cold': run_load(path, runs, cold=True),
+        'load_data.warm': run_load(path, runs, cold=False),
+    }
+    results.update(json.loads(run_python([os.path.abspath(__file__), '--worker', '--data-dir', data_dir, '--runs', str(runs)])))
+    return {f'x{scale}.{name}': result for name, result in results.items()}
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('median_ms', 'bytes', 'gzip_bytes'):
+            if metric in result and previous.get(metric):
+                ratio = result[metric] / previous[metric]
+                # sub-millisecond timings are mostly noise
+                if metric == 'median_ms' and result[metric] - previous[metric] < min_delta_ms:
+                    continue
+                if ratio > 1 + tolerance:
+                    regressions.append(f'{name} {metric}: {previous[metric]:.1f} -> {result[metric]:.1f} ({ratio:.2f}x)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark data loading, callbacks and layout serialization.')
+    parser.add_argument('--scales', default='1,10', help='comma-separated dataset scales, e.g. 1,10,100')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', default=os.path.join(WORK_DIR, 'results.json'))
+    parser.add_argument('--baseline', default=os.path.join(ROOT, 'benchmarks', 'baseline.json'))
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before a regression is reported')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='ignore slowdowns smaller than this')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--clean', action='store_true', help='rebuild the synthetic datasets')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+    if args.clean:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    results = {}
+    for scale in (int(scale) for scale in args.scales.split(',')):
+        results.update(run_scale(scale, args.runs))
+    report = {
+        'meta': {'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(), 'runs': args.runs},
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'baseline saved to {args.baseline}')
+    elif os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Trace where `import app` spends its time, using Python's -X importtime.
+
+Runs the import in a fresh interpreter and lists the slowest modules by
+cumulative and by self time, so deferred imports can be checked after a change.
+
+    python benchmarks/trace_imports.py [--module app] [--top 20] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def trace(module):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                        'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trace import time of the app.')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    modules = trace(args.module)
+    total = sum(m['cumulative_ms'] for m in modules if m['depth'] == 0)
+    by_cumulative = sorted(modules, key=lambda m: -m['cumulative_ms'])[:args.top]
+    by_self = sorted(modules, key=lambda m: -m['self_ms'])[:args.top]
+
+    if args.json:
+        print(json.dumps({'total_ms': total, 'cumulative': by_cumulative, 'self': by_self}, indent=2))
+        return
+    print(f'total import time: {total:.0f} ms')
+    for title, rows, key in (('cumulative', by_cumulative, 'cumulative_ms'), ('self', by_self, 'self_ms')):
+        print(f'\nslowest by {title} time:')
+        for m in rows:
+            print(f"{m[key]:10.1f} ms  {m['module']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -152,6 +152,131 @@ skater_stats= [
     'fenwickAgainstAfterShifts'
 ]
 
+# Column types for the identifying columns of the MoneyPuck skaters file.
+# Every column in skater_stats is parsed as float64, then compacted by data_cache.compact_frame.
+skater_columns = {
+    'playerId': 'int64',
+    'season': 'int64',
+    'name': 'str',
+    'team': 'str',
+    'position': 'str',
+    'situation': 'str',
+}
+
+# Position tabs and the position code each one shows in the data (None = all skaters)
+position_tabs = {
+    'C': 'C',
+    'RW': 'R',
+    'LW': 'L',
+    'D': 'D',
+    'All Skaters': None,
+}
+
+# Tab of team rollups, and how each stat is rolled up from players (anything not listed is summed)
+team_tab = 'Teams'
+team_rollup_methods = {
+    'games_played': 'max',
+    'iceTimeRank': 'mean',
+    'gameScore': 'weighted',
+    'onIce_xGoalsPercentage': 'weighted',
+    'offIce_xGoalsPercentage': 'weighted',
+    'onIce_corsiPercentage': 'weighted',
+    'offIce_corsiPercentage': 'weighted',
+    'onIce_fenwickPercentage': 'weighted',
+    'offIce_fenwickPercentage': 'weighted',
+}
+# Skaters a team has on the ice in each situation, turning summed skater ice time into team time on ice
+# ('other' mixes 4on4, 3on3 and empty-net play; 'all' is the sum of the situations)
+team_skaters_on_ice = {'5on5': 5, '5on4': 5, '4on5': 4, 'other': 5}
+
+# Stats shown as percentile bars on the player card, and rows in each tab's leaderboard
+card_percentile_stats = ['I_F_points', 'I_F_goals', 'I_F_points_per60', 'gameScore', 'onIce_xGoalsPercentage']
+leaderboard_rows = 25
+
+# Stat groups offered by the comparison panel for selected players
+stat_groups = {
+    'Scoring': ['I_F_points', 'I_F_goals', 'I_F_primaryAssists', 'I_F_points_per60', 'I_F_goals_per60', 'shooting_percentage'],
+    'Shooting': ['I_F_shotsOnGoal', 'I_F_shotAttempts', 'I_F_xGoals', 'I_F_highDangerShots', 'goals_per_xGoal', 'I_F_shotsOnGoal_per60'],
+    'Possession': ['onIce_xGoalsPercentage', 'onIce_corsiPercentage', 'onIce_fenwickPercentage', 'onIce_goals_percentage', 'onIce_highDanger_percentage', 'OnIce_F_xGoals_per60'],
+    'Physical': ['I_F_hits', 'shotsBlockedByPlayer', 'I_F_takeaways', 'I_F_giveaways', 'penaltiesDrawn', 'penalityMinutes'],
+    'Usage': ['games_played', 'icetime', 'shifts', 'icetime_5on5', 'icetime_5on4', 'icetime_4on5'],
+}
+
+# Similar players listed in the sidebar, and neighbours precomputed per player (0 = compute on request)
+similar_players_count = 5
+similarity_table_size = 20
+
+# Text columns and rows per page of the full stats table
+stats_table_text_columns = ['name', 'team', 'position']
+stats_table_page_size = 25
+
+# Local cache of NHL mugshots and team logos (offline = serve cached images only)
+image_cache_path = 'data/.cache/images'
+image_cache_max_mb = 200
+image_cache_max_age = 7 * 24 * 3600
+image_fetch_timeout = 5
+image_offline = False
+
+# Sampling profiler for instrumented callbacks: stacks of callbacks slower than profiler_slow_ms are written to profiler_path
+profiler_enabled = False
+profiler_interval_ms = 5
+profiler_slow_ms = 250
+profiler_path = 'data/.cache/profiles'
+
+# Directory where gunicorn workers share their metrics, so /metrics and /cache-stats cover every worker
+metrics_multiprocess_dir = 'data/.cache/metrics'
+
+# Serialized layout written at deploy time by `python layout_cache.py`, and the files it is built from:
+# every module feeding build_layout or the season Datasets, so a change to any of them retires the snapshot
+layout_snapshot_path = 'data/.cache/layout'
+layout_sources = [
+    'app.py', 'utilities.py', 'config.py', 'analytics.py', 'data_store.py', 'data_cache.py',
+    'player_index.py', 'similarity.py', 'layout_cache.py', 'response_cache.py', 'image_cache.py',
+    'instrumentation.py',
+]
+
+# Plotly figure templates, loaded on the first server-side figure build
+figure_templates = ['minty', 'minty_dark']
+
+# Leaders kept per stat, and the choices offered by the "Top players by" selector
+leaderboard_size = 250
+top_n_options = [10, 25, 50, 100, 250]
+
+# Season partitions (data/seasons/<year>/skaters.csv) and the memory loaded seasons may use per worker
+season_data_dir = 'data/seasons'
+season_memory_budget_mb = 256
+
+# Newest seasons loaded before the gunicorn workers fork; the rest load on first use
+season_preload_count = 1
+
+# Directory (relative to the data file) holding the columnar cache built by data_cache.py
+data_cache_dir = '.cache'
+
+# Stats are kept as float32 when rounding back to at most this many decimals restores every value exactly
+compact_max_decimals = 6
+
+# Seconds between checks for refreshed season data (0 = never reload)
+data_reload_interval = 60
+
+# Build the position charts in the browser from a once-shipped copy of the position's stats
+clientside_charts = False
+
+# Charts with more points than this are drawn with WebGL (go.Scattergl)
+scattergl_threshold = 500
+
+# Marker color for teams missing from teams_color
+default_team_color = '#888888'
+
+# Callback response cache: responses kept in each worker and their lifetime in seconds (0 = until evicted).
+# The shared tier is 'file' (responses under response_cache_path), 'redis' (a Redis-compatible
+# server at response_cache_redis_url; needs the redis package) or None
+response_cache_size = 256
+response_cache_ttl = 24 * 3600
+response_cache_backend = 'file'
+response_cache_path = 'data/.cache/responses'
+response_cache_disk_size = 2048
+response_cache_redis_url = 'redis://localhost:6379/0'
+
 stats_map = {
     'games_played': 'Games Played',
     'icetime': 'Icetime (min)',
@@ -303,6 +428,51 @@ stats_map = {
     'fenwickAgainstAfterShifts': 'Fenwick Against - After Shifts'
 }
 
+# Derived metrics, computed once at load time by analytics.add_derived_stats.
+#   per60: stat per 60 minutes of the row's ice time
+#   ratio: numerator / denominator (times scale)
+#   share: numerator / (numerator + other) (times scale)
+#   split: a stat taken from the player's row for another situation (times scale)
+# Splits run last, so they can split per60, ratio and share metrics too.
+derived_stats = {
+    'I_F_points_per60': {'label': 'Points / 60', 'kind': 'per60', 'stat': 'I_F_points'},
+    'I_F_goals_per60': {'label': 'Goals / 60', 'kind': 'per60', 'stat': 'I_F_goals'},
+    'I_F_primaryAssists_per60': {'label': 'Primary Assists / 60', 'kind': 'per60', 'stat': 'I_F_primaryAssists'},
+    'I_F_shotsOnGoal_per60': {'label': 'Shots On Goal / 60', 'kind': 'per60', 'stat': 'I_F_shotsOnGoal'},
+    'I_F_shotAttempts_per60': {'label': 'Shot Attempts / 60', 'kind': 'per60', 'stat': 'I_F_shotAttempts'},
+    'I_F_xGoals_per60': {'label': 'xGoals / 60', 'kind': 'per60', 'stat': 'I_F_xGoals'},
+    'I_F_hits_per60': {'label': 'Hits / 60', 'kind': 'per60', 'stat': 'I_F_hits'},
+    'I_F_takeaways_per60': {'label': 'Takeaways / 60', 'kind': 'per60', 'stat': 'I_F_takeaways'},
+    'I_F_giveaways_per60': {'label': 'Giveaways / 60', 'kind': 'per60', 'stat': 'I_F_giveaways'},
+    'shotsBlockedByPlayer_per60': {'label': 'Shots Blocked / 60', 'kind': 'per60', 'stat': 'shotsBlockedByPlayer'},
+    'OnIce_F_xGoals_per60': {'label': 'xGoals For / 60 - On Ice', 'kind': 'per60', 'stat': 'OnIce_F_xGoals'},
+    'OnIce_A_xGoals_per60': {'label': 'xGoals Against / 60 - On Ice', 'kind': 'per60', 'stat': 'OnIce_A_xGoals'},
+    'shooting_percentage': {'label': 'Shooting %', 'kind': 'ratio', 'numerator': 'I_F_goals', 'denominator': 'I_F_shotsOnGoal', 'scale': 100},
+    'goals_per_xGoal': {'label': 'Goals / xGoals', 'kind': 'ratio', 'numerator': 'I_F_goals', 'denominator': 'I_F_xGoals', 'scale': 1},
+    'primary_assist_share': {'label': 'Primary Assist %', 'kind': 'share', 'numerator': 'I_F_primaryAssists', 'other': 'I_F_secondaryAssists', 'scale': 100},
+    'faceoff_percentage': {'label': 'Faceoff %', 'kind': 'share', 'numerator': 'faceoffsWon', 'other': 'faceoffsLost', 'scale': 100},
+    'onIce_goals_percentage': {'label': 'Goals Percentage - On Ice', 'kind': 'share', 'numerator': 'OnIce_F_goals', 'other': 'OnIce_A_goals', 'scale': 100},
+    'onIce_highDanger_percentage': {'label': 'High Danger Shots Percentage - On Ice', 'kind': 'share', 'numerator': 'OnIce_F_highDangerShots', 'other': 'OnIce_A_highDangerShots', 'scale': 100},
+    'icetime_5on5': {'label': 'Icetime (min) - 5on5', 'kind': 'split', 'stat': 'icetime', 'situation': '5on5', 'scale': 1 / 60},
+    'icetime_5on4': {'label': 'Icetime (min) - Power Play', 'kind': 'split', 'stat': 'icetime', 'situation': '5on4', 'scale': 1 / 60},
+    'icetime_4on5': {'label': 'Icetime (min) - Penalty Kill', 'kind': 'split', 'stat': 'icetime', 'situation': '4on5', 'scale': 1 / 60},
+    'I_F_points_5on5': {'label': 'Points - 5on5', 'kind': 'split', 'stat': 'I_F_points', 'situation': '5on5'},
+    'I_F_points_5on4': {'label': 'Points - Power Play', 'kind': 'split', 'stat': 'I_F_points', 'situation': '5on4'},
+    'I_F_points_4on5': {'label': 'Points - Penalty Kill', 'kind': 'split', 'stat': 'I_F_points', 'situation': '4on5'},
+    'I_F_points_other': {'label': 'Points - Other Situations', 'kind': 'split', 'stat': 'I_F_points', 'situation': 'other'},
+    'I_F_points_per60_5on5': {'label': 'Points / 60 - 5on5', 'kind': 'split', 'stat': 'I_F_points_per60', 'situation': '5on5'},
+    'I_F_points_per60_5on4': {'label': 'Points / 60 - Power Play', 'kind': 'split', 'stat': 'I_F_points_per60', 'situation': '5on4'},
+    'I_F_goals_5on4': {'label': 'Goals - Power Play', 'kind': 'split', 'stat': 'I_F_goals', 'situation': '5on4'},
+    'I_F_xGoals_per60_5on5': {'label': 'xGoals / 60 - 5on5', 'kind': 'split', 'stat': 'I_F_xGoals_per60', 'situation': '5on5'},
+    'onIce_xGoalsPercentage_5on5': {'label': 'xGoals Percentage - On Ice - 5on5', 'kind': 'split', 'stat': 'onIce_xGoalsPercentage', 'situation': '5on5'},
+    'onIce_corsiPercentage_5on5': {'label': 'Corsi Percentage - On Ice - 5on5', 'kind': 'split', 'stat': 'onIce_corsiPercentage', 'situation': '5on5'},
+    'onIce_goals_percentage_5on5': {'label': 'Goals Percentage - On Ice - 5on5', 'kind': 'split', 'stat': 'onIce_goals_percentage', 'situation': '5on5'},
+}
+stats_map.update({stat: spec['label'] for stat, spec in derived_stats.items()})
+
+# Stats offered in the chart and leaderboard dropdowns
+chart_stats = skater_stats + list(derived_stats)
+
 # List to map the main color for each NFL team
 teams_color = {
     'ANA': '#F47A38', 
@@ -504,6 +674,20 @@ CONTENT_STYLE = {
     "padding": "2rem 1rem",
 }
 
+# Chart colors for the color-mode switch (True = dark mode)
+chart_themes = {
+    True: {
+        'plot_bgcolor': '#343A40',
+        'paper_bgcolor': '#2B3035',
+        'font_color': '#c9c9c9'
+    },
+    False: {
+        'plot_bgcolor': '#F8F9FA',
+        'paper_bgcolor': '#FFFFFF',
+        'font_color': '#343A40'
+    }
+}
+
 styles = {
     'pre': {
         'border': 'thin lightgrey solid',
@@ -0,0 +1,324 @@
+"""
+Columnar cache for the MoneyPuck skaters data.
+
+The CSV is parsed once into memory-mapped NumPy column files so worker boots
+skip the text parse and dtype inference. Layout, next to the CSV:
+
+    <data dir>/.cache/<csv stem>/current.json                manifest of the live build
+    <data dir>/.cache/<csv stem>/<sha1>/floats.npy           float32 stat columns, one row per column
+    <data dir>/.cache/<csv stem>/<sha1>/doubles.npy          stat columns kept as float64, one row per column
+    <data dir>/.cache/<csv stem>/<sha1>/<col>.npy            one downcast array per integer column
+    <data dir>/.cache/<csv stem>/<sha1>/<col>.codes.npy      category codes of a text column
+    <data dir>/.cache/<csv stem>/<sha1>/<col>.categories.npy categories of a text column
+
+Data is kept compact (see compact_frame): text columns are categoricals,
+integer columns are downcast and stats are float32 wherever rounding back to
+their decimals restores every value exactly.
+
+Run `python data_cache.py` to build the cache of every season at deploy time.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import skater_stats, skater_columns, data_cache_dir, stats_map, compact_max_decimals
+
+CACHE_FORMAT = 2
+
+
+def get_schema():
+    """
+    Return the explicit column dtypes used to parse the skaters CSV.
+
+    Returns:
+        dict: column name -> pandas dtype
+    """
+    schema = {col: ('object' if dtype == 'str' else dtype) for col, dtype in skater_columns.items()}
+    schema.update({stat: 'float64' for stat in skater_stats})
+    return schema
+
+
+def file_digest(file_path):
+    """
+    Return the sha1 hex digest of a file.
+
+    Args:
+        file_path (str): path of the file to hash.
+
+    Returns:
+        str: sha1 hex digest
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_root(file_path):
+    """
+    Return the cache directory for a data file.
+
+    Args:
+        file_path (str): path of the CSV file.
+
+    Returns:
+        str: cache directory path
+    """
+    data_dir, file_name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(data_dir, data_cache_dir, os.path.splitext(file_name)[0])
+
+
+def read_manifest(cache_root):
+    """
+    Return the manifest of the live cache build, or None if there is none.
+
+    Args:
+        cache_root (str): cache directory of the data file.
+
+    Returns:
+        dict: manifest or None
+    """
+    try:
+        with open(os.path.join(cache_root, 'current.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != CACHE_FORMAT:
+        return None
+    return manifest
+
+
+def write_manifest(cache_root, manifest):
+    """
+    Atomically replace the manifest of the live cache build.
+
+    Args:
+        cache_root (str): cache directory of the data file.
+        manifest (dict): manifest to write.
+    """
+    tmp_path = os.path.join(cache_root, f'current.json.{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(cache_root, 'current.json'))
+
+
+def read_csv(file_path):
+    """
+    Parse the skaters CSV with the explicit schema.
+
+    Args:
+        file_path (str): path of the CSV file.
+
+    Returns:
+        pd.DataFrame: parsed data
+    """
+    schema = get_schema()
+    header = pd.read_csv(file_path, nrows=0).columns
+    return pd.read_csv(file_path, dtype={col: dtype for col, dtype in schema.items() if col in header})
+
+
+def get_stat_decimals(df, stats, max_decimals):
+    """
+    Return the stats that survive a float32 round trip, with the decimals that restore them.
+
+    A stat passes when its float32 copy, rounded to some number of decimals up
+    to max_decimals, equals the original float64 values exactly (NaNs included).
+
+    Args:
+        df (pd.DataFrame): parsed data.
+        stats (iterable): stats to validate (e.g., the keys of config.stats_map).
+        max_decimals (int): most decimals tried.
+
+    Returns:
+        dict: stat -> decimals, for every stat that can be stored as float32
+    """
+    decimals = {}
+    for stat in stats:
+        if stat not in df.columns or df[stat].dtype != 'float64':
+            continue
+        values = df[stat].to_numpy()
+        restored = values.astype('float32').astype('float64')
+        for places in range(max_decimals + 1):
+            if np.array_equal(restored.round(places), values, equal_nan=True):
+                decimals[stat] = places
+                break
+    return decimals
+
+
+def compact_frame(df):
+    """
+    Return the data with compact dtypes.
+
+    Text columns become categoricals, integer columns are downcast to the
+    smallest integer type holding them, and the stats validated by
+    get_stat_decimals against config.stats_map are stored as float32. Other
+    float columns stay float64. The decimals of the float32 stats are kept
+    in df.attrs['decimals'] so exact values can be restored.
+
+    Args:
+        df (pd.DataFrame): parsed data.
+
+    Returns:
+        pd.DataFrame: compact copy of the data
+    """
+    decimals = get_stat_decimals(df, stats_map, compact_max_decimals)
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in decimals:
+            columns[col] = values.astype('float32')
+        elif values.dtype.kind in 'iu':
+            columns[col] = pd.to_numeric(values, downcast='integer')
+        elif values.dtype.kind == 'O':
+            columns[col] = values.fillna('').astype('category')
+        else:
+            columns[col] = values
+    compact = pd.DataFrame(columns)
+    compact.attrs.update(df.attrs, decimals=decimals)
+    return compact
+
+
+def build_cache(file_path, digest=None):
+    """
+    Convert the CSV into memory-mappable column files and make them the live build.
+
+    Args:
+        file_path (str): path of the CSV file.
+        digest (str): sha1 of the CSV if already known.
+
+    Returns:
+        dict: manifest of the new build
+    """
+    stat = os.stat(file_path)
+    digest = digest or file_digest(file_path)
+    df = compact_frame(read_csv(file_path))
+
+    cache_root = get_cache_root(file_path)
+    build_dir = os.path.join(cache_root, digest)
+    tmp_dir = f'{build_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    float_cols = [col for col in df.columns if df[col].dtype == 'float32']
+    double_cols = [col for col in df.columns if df[col].dtype == 'float64']
+    int_cols = [col for col in df.columns if df[col].dtype.kind in 'iu']
+    category_cols = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+    np.save(os.path.join(tmp_dir, 'floats.npy'), np.ascontiguousarray(df[float_cols].to_numpy(dtype='float32').T))
+    np.save(os.path.join(tmp_dir, 'doubles.npy'), np.ascontiguousarray(df[double_cols].to_numpy(dtype='float64').T))
+    for col in int_cols:
+        np.save(os.path.join(tmp_dir, f'{col}.npy'), df[col].to_numpy())
+    for col in category_cols:
+        np.save(os.path.join(tmp_dir, f'{col}.codes.npy'), df[col].cat.codes.to_numpy())
+        np.save(os.path.join(tmp_dir, f'{col}.categories.npy'), df[col].cat.categories.to_numpy(dtype='U'))
+
+    if os.path.isdir(build_dir):
+        shutil.rmtree(tmp_dir)
+    else:
+        os.replace(tmp_dir, build_dir)
+
+    manifest = {
+        'format': CACHE_FORMAT,
+        'build': digest,
+        'csv_mtime': stat.st_mtime,
+        'csv_size': stat.st_size,
+        'columns': df.columns.tolist(),
+        'float_columns': float_cols,
+        'double_columns': double_cols,
+        'int_columns': int_cols,
+        'category_columns': category_cols,
+        'decimals': df.attrs['decimals'],
+    }
+    write_manifest(cache_root, manifest)
+    prune_cache(cache_root, keep=digest)
+    return manifest
+
+
+def prune_cache(cache_root, keep):
+    """
+    Remove cache builds other than the live one.
+
+    Args:
+        cache_root (str): cache directory of the data file.
+        keep (str): build to keep.
+    """
+    for entry in os.listdir(cache_root):
+        path = os.path.join(cache_root, entry)
+        if entry != keep and os.path.isdir(path) and not entry.endswith('.tmp'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def get_fresh_manifest(file_path):
+    """
+    Return the manifest of a cache build matching the CSV, rebuilding it if the CSV changed.
+
+    The CSV is only hashed when its mtime or size differ from the manifest.
+
+    Args:
+        file_path (str): path of the CSV file.
+
+    Returns:
+        dict: manifest of the live build
+    """
+    stat = os.stat(file_path)
+    cache_root = get_cache_root(file_path)
+    manifest = read_manifest(cache_root)
+    if manifest and manifest['csv_mtime'] == stat.st_mtime and manifest['csv_size'] == stat.st_size:
+        return manifest
+
+    digest = file_digest(file_path)
+    if manifest and manifest['build'] == digest and os.path.isdir(os.path.join(cache_root, digest)):
+        manifest.update(csv_mtime=stat.st_mtime, csv_size=stat.st_size)
+        write_manifest(cache_root, manifest)
+        return manifest
+    return build_cache(file_path, digest)
+
+
+def load_cache(file_path):
+    """
+    Load the skaters data from the columnar cache, building or refreshing it as needed.
+
+    The float32 stat columns are memory-mapped, so the float block is shared
+    through the page cache between every worker reading the same build.
+
+    Args:
+        file_path (str): path of the CSV file.
+
+    Returns:
+        pd.DataFrame: the loaded DataFrame
+    """
+    manifest = get_fresh_manifest(file_path)
+    build_dir = os.path.join(get_cache_root(file_path), manifest['build'])
+
+    floats = np.load(os.path.join(build_dir, 'floats.npy'), mmap_mode='r')
+    df = pd.DataFrame(floats.T, columns=manifest['float_columns'], copy=False)
+    doubles = np.load(os.path.join(build_dir, 'doubles.npy'))
+    other_cols = {col: doubles[i] for i, col in enumerate(manifest['double_columns'])}
+    for col in manifest['int_columns']:
+        other_cols[col] = np.load(os.path.join(build_dir, f'{col}.npy'))
+    for col in manifest['category_columns']:
+        codes = np.load(os.path.join(build_dir, f'{col}.codes.npy'))
+        categories = np.load(os.path.join(build_dir, f'{col}.categories.npy')).astype(object)
+        other_cols[col] = pd.Categorical.from_codes(codes, categories)
+
+    # insert in column order so the float block is never copied by a reindex
+    for position, col in enumerate(manifest['columns']):
+        if col in other_cols:
+            df.insert(position, col, other_cols[col])
+    df.attrs['version'] = manifest['build']
+    df.attrs['decimals'] = manifest['decimals']
+    return df
+
+
+if __name__ == '__main__':
+    from config import season_data_dir
+    default_paths = [os.path.join(season_data_dir, season, 'skaters.csv') for season in sorted(os.listdir(season_data_dir))]
+    for path in sys.argv[1:] or [path for path in default_paths if os.path.isfile(path)]:
+        manifest = build_cache(path)
+        print(f"{path}: cached build {manifest['build']} ({len(manifest['columns'])} columns)")
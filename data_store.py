@@ -0,0 +1,365 @@
+"""
+Season data store for the NHL Stats Dashboard.
+
+Each season lives in its own partition, data/seasons/<year>/skaters.csv (with
+its columnar cache next to it). Seasons are loaded lazily on first request and
+kept behind an LRU bounded by a memory budget, so a worker never holds every
+season on disk.
+
+A background watcher picks up refreshed data files and new seasons: the new
+Dataset is built off the request path and swapped in atomically, so callbacks
+read either the old or the new version, never a mix. Under gunicorn the
+watcher runs in the master, which restarts the workers after a refresh.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from utilities import load_data, get_chart_frame, build_default_figures, build_chart_payload
+from player_index import PlayerIndex
+from layout_cache import make_payload
+from analytics import Leaderboards, RankTables, StatsTable, add_derived_stats, team_rollup
+from similarity import SimilarityIndex
+from config import skater_stats, chart_stats, derived_stats, position_tabs, leaderboard_size, similarity_table_size, stats_table_text_columns, team_tab, team_rollup_methods, team_skaters_on_ice, clientside_charts
+
+
+def format_season(season):
+    """
+    Return the display label of a season.
+
+    Args:
+        season (int): starting year of the season (e.g., 2023).
+
+    Returns:
+        str: season label (e.g., '2023-2024')
+    """
+    return f'{season}-{season + 1}'
+
+
+class Dataset:
+    """
+    One season's data and the indexes built from it.
+
+    Args:
+        season (int): starting year of the season.
+        df (pd.DataFrame): DataFrame of all player data for the season.
+    """
+
+    def __init__(self, season, df):
+        df = add_derived_stats(df, derived_stats)
+        self.season = season
+        self.version = df.attrs.get('version')
+        self.player_index = PlayerIndex(df)
+        self.leaderboards = Leaderboards(df, chart_stats, position_tabs, leaderboard_size)
+        chart_frame = get_chart_frame(df)
+        self.chart_frame = chart_frame
+        # position tabs are row positions into the one chart frame, not copied sub-frames
+        positions = chart_frame['position'].to_numpy()
+        self.position_rows = {
+            tab: np.arange(len(chart_frame)) if code is None else np.flatnonzero(positions == code)
+            for tab, code in position_tabs.items()
+        }
+        self.rank_tables = RankTables(chart_frame, chart_stats)
+        self.similarity = SimilarityIndex(chart_frame, skater_stats, similarity_table_size)
+        self.stats_table = StatsTable(chart_frame, stats_table_text_columns, chart_stats)
+        # team rollups of every situation are built once per data version and charted like a position tab
+        team_df = add_derived_stats(team_rollup(df, skater_stats, team_rollup_methods, team_tab, team_skaters_on_ice), derived_stats)
+        self.team_leaderboards = Leaderboards(team_df, chart_stats, {team_tab: None}, leaderboard_size)
+        self.team_frame = get_chart_frame(team_df)
+        self.team_rank_tables = RankTables(self.team_frame, chart_stats)
+        self.position_rows[team_tab] = np.arange(len(self.team_frame))
+        chart_positions = [*position_tabs, team_tab]
+        # one payload per season for the clientside charts, shared by every tab
+        self.chart_payload = make_payload(json.dumps(build_chart_payload(self, chart_positions)).encode()) if clientside_charts else None
+        # default chart of every tab, embedded in the layout instead of built by a callback per visit
+        self.default_figures = build_default_figures(self, chart_positions)
+        # everything a loaded season holds, so the LRU budget bounds the real footprint
+        indexes = (self.player_index, self.leaderboards, self.rank_tables, self.similarity,
+                   self.stats_table, self.team_leaderboards, self.team_rank_tables)
+        frames = (chart_frame, self.team_frame)
+        arrays = self.position_rows.values()
+        self.nbytes = (sum(index.nbytes for index in indexes)
+                       + int(sum(frame.memory_usage(deep=True).sum() for frame in frames))
+                       + sum(rows.nbytes for rows in arrays)
+                       + sum(map(len, self.default_figures.values()))
+                       + (len(self.chart_payload['body']) + len(self.chart_payload['gzip_body']) if self.chart_payload else 0))
+
+    def frame(self, position):
+        """
+        Return the chart frame a position tab charts from.
+
+        Args:
+            position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+
+        Returns:
+            pd.DataFrame: the team rollups for the teams tab, otherwise the chart frame of all skaters
+        """
+        return self.team_frame if position == team_tab else self.chart_frame
+
+    def top(self, position, stat, n):
+        """
+        Return the IDs of a position tab's leaders for a stat.
+
+        Args:
+            position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+            stat (str): stat to rank by.
+            n (int): number of players (or teams), at most the leaderboard size.
+
+        Returns:
+            list: IDs, best first
+        """
+        leaderboards = self.team_leaderboards if position == team_tab else self.leaderboards
+        return leaderboards.top(position, stat, n)
+
+    def ranks(self, position):
+        """
+        Return the rank tables of a position tab's rows.
+
+        Args:
+            position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+
+        Returns:
+            RankTables: ranks of the teams for the teams tab, otherwise of all skaters
+        """
+        return self.team_rank_tables if position == team_tab else self.rank_tables
+
+    def position_ids(self, position):
+        """
+        Return the IDs of a position tab's players.
+
+        Args:
+            position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+
+        Returns:
+            np.ndarray: player IDs in chart frame order
+        """
+        return self.frame(position).index.to_numpy()[self.position_rows[position]]
+
+    def position_column(self, position, column):
+        """
+        Return one chart frame column for a position tab's players.
+
+        Args:
+            position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+            column (str): chart frame column.
+
+        Returns:
+            np.ndarray: column values in chart frame order
+        """
+        return self.frame(position)[column].to_numpy()[self.position_rows[position]]
+
+
+class SeasonStore:
+    """
+    Lazily loaded seasons behind an LRU with a memory budget.
+
+    The most recently used season is always kept, even if it alone exceeds the budget.
+
+    Args:
+        data_dir (str): directory holding one sub-directory per season.
+        memory_budget_mb (int): memory allowed for loaded seasons.
+        file_name (str): data file name inside each season directory.
+    """
+
+    def __init__(self, data_dir, memory_budget_mb, file_name='skaters.csv'):
+        self.data_dir = data_dir
+        self.file_name = file_name
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.loaded = OrderedDict()
+        self.signatures = {}
+        self.pending = {}
+        self.loading = {}
+        self.listeners = []
+        self.watcher = None
+        self.lock = threading.Lock()
+        self.seasons = self._discover()
+        if not self.seasons:
+            raise Exception(f"No season data found in '{data_dir}'.")
+
+    def _discover(self):
+        return sorted(
+            int(entry) for entry in os.listdir(self.data_dir)
+            if entry.isdigit() and os.path.isfile(os.path.join(self.data_dir, entry, self.file_name))
+        )
+
+    def _signature(self, season):
+        try:
+            stat = os.stat(self.file_path(season))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def latest(self):
+        """
+        int: the most recent season on disk
+        """
+        return self.seasons[-1]
+
+    def file_path(self, season):
+        """
+        Return the data file of a season.
+
+        Args:
+            season (int): starting year of the season.
+
+        Returns:
+            str: path of the season's data file
+        """
+        return os.path.join(self.data_dir, str(season), self.file_name)
+
+    def preload(self, count=1):
+        """
+        Load the newest seasons ahead of the first request.
+
+        Called in the gunicorn master before workers fork, so every worker
+        shares the preloaded seasons copy-on-write; older seasons are left to
+        load on demand.
+
+        Args:
+            count (int): number of seasons to load, newest first.
+        """
+        # oldest of them first, so the latest ends up most recently used
+        for season in self.seasons[-max(count, 1):]:
+            self.get(season)
+
+    def get(self, season=None):
+        """
+        Return a season's Dataset, loading it on first use.
+
+        Args:
+            season (int): starting year of the season, the latest season if None.
+
+        Returns:
+            Dataset: the season's data
+        """
+        season = self.latest if season is None else int(season)
+        with self.lock:
+            if season in self.loaded:
+                self.loaded.move_to_end(season)
+                return self.loaded[season]
+            if season not in self.seasons:
+                raise KeyError(f'Unknown season {season}')
+            loading = self.loading.setdefault(season, threading.Lock())
+
+        # built outside the store lock, so requests for loaded seasons are never held up;
+        # concurrent requests for the same cold season wait for one build
+        with loading:
+            with self.lock:
+                if season in self.loaded:
+                    self.loaded.move_to_end(season)
+                    return self.loaded[season]
+            signature = self._signature(season)
+            dataset = Dataset(season, load_data(self.file_path(season)))
+            with self.lock:
+                self.signatures[season] = signature
+                self.loaded[season] = dataset
+                self.loaded.move_to_end(season)
+                self._evict()
+                self.loading.pop(season, None)
+            return dataset
+
+    def add_listener(self, listener):
+        """
+        Register a function called as listener(swapped) after a refresh swapped in reloaded
+        seasons or changed the seasons on disk.
+
+        The store's seasons are already up to date when listeners are called.
+
+        Args:
+            listener (function): the function to call with the list of seasons swapped in.
+        """
+        self.listeners.append(listener)
+
+    def refresh(self):
+        """
+        Reload loaded seasons whose data file changed, load a newly added latest season and drop removed ones.
+
+        A changed file is only read once its size and mtime are the same on two
+        consecutive checks, so a file still being written is never parsed. The
+        new Dataset is built without holding the lock; requests keep reading
+        the old one until it is swapped in.
+
+        Returns:
+            list: seasons swapped in
+        """
+        seasons = self._discover() or self.seasons
+        with self.lock:
+            # seasons removed from disk are forgotten, not kept loaded or watched
+            for season in set(self.loaded) | set(self.signatures) | set(self.pending):
+                if season not in seasons:
+                    self.loaded.pop(season, None)
+                    self.signatures.pop(season, None)
+                    self.pending.pop(season, None)
+            candidates = list(self.loaded)
+        if seasons[-1] not in candidates:
+            candidates.append(seasons[-1])
+
+        swapped = []
+        for season in candidates:
+            signature = self._signature(season)
+            if signature is None or signature == self.signatures.get(season):
+                continue
+            if self.pending.get(season) != signature:
+                self.pending[season] = signature
+                continue
+            del self.pending[season]
+            dataset = Dataset(season, load_data(self.file_path(season)))
+            with self.lock:
+                self.signatures[season] = signature
+                self.loaded[season] = dataset
+                self.loaded.move_to_end(season)
+                self._evict()
+            swapped.append(season)
+
+        # a new latest season is only published once it is loaded, so no request parses it
+        if seasons[-1] not in self.seasons and seasons[-1] not in self.loaded:
+            seasons = seasons[:-1]
+        changed = seasons != self.seasons
+        self.seasons = seasons
+        if swapped or changed:
+            for listener in self.listeners:
+                listener(swapped)
+        return swapped
+
+    def start_watcher(self, interval):
+        """
+        Check for refreshed data in a background thread.
+
+        Args:
+            interval (float): seconds between checks.
+        """
+        if self.watcher is not None:
+            return
+        # a process forked while the watcher swaps a season must not inherit the held lock
+        os.register_at_fork(before=self.lock.acquire, after_in_parent=self.lock.release, after_in_child=self.lock.release)
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # keep serving the current data and try again on the next check
+                    logging.getLogger(__name__).exception('Reloading season data failed')
+
+        self.watcher = threading.Thread(target=watch, name='season-watcher', daemon=True)
+        self.watcher.start()
+
+    def _evict(self):
+        while len(self.loaded) > 1 and sum(dataset.nbytes for dataset in self.loaded.values()) > self.memory_budget:
+            self.loaded.popitem(last=False)
+
+    def season_options(self):
+        """
+        Return dropdown options for every season on disk, newest first.
+
+        Returns:
+            list: dropdown options
+        """
+        return [{'label': format_season(season), 'value': season} for season in reversed(self.seasons)]
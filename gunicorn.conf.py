@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for the NHL Stats Dashboard.
+
+The app is imported once in the master (preload_app), which loads the season
+data and builds its indexes before the workers fork. Workers then share those
+pages copy-on-write; gc.freeze() moves everything loaded so far out of the
+garbage collector's reach so collections in the workers do not write to (and
+copy) the shared pages.
+
+Workers default to 2 x cores + 1; set WEB_CONCURRENCY to override. The
+master watches the data files: a refreshed season is parsed once, in the
+master, which then restarts the workers gracefully (as on SIGHUP) so the new
+ones fork from the refreshed data and share it copy-on-write again.
+
+Each worker keeps its own metrics and shares them through
+config.metrics_multiprocess_dir, cleared when the server starts, so /metrics
+and /cache-stats report every worker.
+"""
+import gc
+import multiprocessing
+import os
+import signal
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = 60
+
+
+def on_starting(server):
+    import instrumentation
+    from config import metrics_multiprocess_dir
+    instrumentation.enable_multiprocess(metrics_multiprocess_dir)
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    import app
+    from config import data_reload_interval, season_preload_count
+    app.season_store.preload(season_preload_count)
+    gc.collect()
+    gc.freeze()
+    if data_reload_interval:
+        app.season_store.add_listener(restart_workers)
+        app.season_store.start_watcher(data_reload_interval)
+
+
+def restart_workers(swapped):
+    # runs in the master's watcher thread once the refreshed seasons are swapped in
+    gc.collect()
+    gc.freeze()
+    os.kill(os.getpid(), signal.SIGHUP)
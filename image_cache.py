@@ -0,0 +1,321 @@
+"""
+Local proxy and disk cache for NHL player mugshots and team logos.
+
+The browser only ever loads images from this app: /images/... routes serve
+them from a size-bounded disk cache, fetching from assets.nhle.com on a miss
+(unless offline) and falling back to a placeholder when an image is missing.
+
+Run `python image_cache.py prefetch` to fill the cache for every season on
+disk, or `python image_cache.py import <dir>` to seed it from a copy of
+another cache directory without network access.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+import requests
+
+from config import image_cache_path, image_cache_max_mb, image_cache_max_age, image_fetch_timeout
+
+SOURCE_URL = 'https://assets.nhle.com'
+TEAM_CODE = re.compile(r'^[A-Z]{2,3}$')
+MIMETYPES = {'.png': 'image/png', '.svg': 'image/svg+xml'}
+# A miss is not retried upstream for this long
+MISS_TTL = 3600
+# Misses remembered at most, oldest forgotten first
+MISS_LIMIT = 4096
+
+PLACEHOLDERS = {
+    'mug': (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 168 168">'
+        '<rect width="168" height="168" fill="#adb5bd"/>'
+        '<circle cx="84" cy="64" r="32" fill="#e9ecef"/>'
+        '<path d="M24 168c0-40 27-62 60-62s60 22 60 62z" fill="#e9ecef"/></svg>'
+    ),
+    'logo': (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        '<circle cx="50" cy="50" r="46" fill="none" stroke="#adb5bd" stroke-width="6"/></svg>'
+    ),
+}
+
+
+def get_mug_path(season, team, player_id):
+    """
+    Return the cache-relative path of a player mugshot.
+
+    Args:
+        season (int): starting year of the season (e.g., 2023).
+        team (str): team abbreviation.
+        player_id (int): player ID
+
+    Returns:
+        str: relative path, also the path on assets.nhle.com
+    """
+    return f'mugs/nhl/{season}{season + 1}/{team}/{player_id}.png'
+
+
+def get_logo_path(team):
+    """
+    Return the cache-relative path of a team logo.
+
+    Args:
+        team (str): team abbreviation.
+
+    Returns:
+        str: relative path, also the path on assets.nhle.com
+    """
+    return f'logos/nhl/svg/{team}_light.svg'
+
+
+class ImageCache:
+    """
+    Size-bounded disk cache of upstream images, least recently used evicted first.
+
+    Args:
+        directory (str): cache directory.
+        max_mb (int): disk space allowed for cached images.
+        offline (bool): never fetch upstream, serve only what is cached.
+        timeout (float): upstream request timeout in seconds.
+    """
+
+    def __init__(self, directory, max_mb, offline=False, timeout=5):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.offline = offline
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.misses = OrderedDict()
+        self.session = requests.Session()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self._files())
+
+    def _files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    yield os.path.join(root, name)
+
+    def get(self, path):
+        """
+        Return a cached image, fetching it upstream on a miss.
+
+        Args:
+            path (str): relative image path from get_mug_path or get_logo_path.
+
+        Returns:
+            bytes: image content, or None if the image is unavailable
+        """
+        file_path = os.path.join(self.directory, path)
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            os.utime(file_path)
+            return content
+        except OSError:
+            pass
+
+        if self.offline:
+            return None
+        with self.lock:
+            missed_at = self.misses.get(path, 0)
+        if time.time() - missed_at < MISS_TTL:
+            return None
+        content = self.fetch(path)
+        if content is None:
+            self._miss(path)
+            return None
+        self.put(path, content)
+        return content
+
+    def fetch(self, path):
+        """
+        Download an image from assets.nhle.com.
+
+        Args:
+            path (str): relative image path.
+
+        Returns:
+            bytes: image content, or None if the download failed
+        """
+        try:
+            response = self.session.get(f'{SOURCE_URL}/{path}', timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200 or not response.content:
+            return None
+        return response.content
+
+    def put(self, path, content):
+        """
+        Atomically write an image to the cache and evict old images over the size limit.
+
+        Args:
+            path (str): relative image path.
+            content (bytes): image content.
+        """
+        file_path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        with self.lock:
+            previous = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            os.replace(tmp_path, file_path)
+            self.size += len(content) - previous
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _miss(self, path):
+        with self.lock:
+            self.misses[path] = time.time()
+            self.misses.move_to_end(path)
+            while len(self.misses) > MISS_LIMIT:
+                self.misses.popitem(last=False)
+
+    def _evict(self):
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        self.size = sum(size for _, size, _ in files)
+        # drop down to 90% of the limit so eviction does not run on every write
+        for _, size, path in sorted(files):
+            if self.size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
+
+
+def image_response(cache, path, kind):
+    """
+    Return the response for a cached image, or a placeholder if it is unavailable.
+
+    Args:
+        cache (ImageCache): image cache.
+        path (str): relative image path.
+        kind (str): 'mug' or 'logo', selects the placeholder.
+
+    Returns:
+        flask.Response: the image with long-lived cache headers
+    """
+    content = cache.get(path)
+    if content is None:
+        response = flask.Response(PLACEHOLDERS[kind], mimetype='image/svg+xml')
+        # placeholders expire quickly so the real image shows once it is cached
+        response.headers['Cache-Control'] = 'public, max-age=300'
+        return response
+    response = flask.Response(content, mimetype=MIMETYPES[os.path.splitext(path)[1]])
+    response.add_etag()
+    response.headers['Cache-Control'] = f'public, max-age={image_cache_max_age}, immutable'
+    return response.make_conditional(flask.request)
+
+
+def register_image_routes(server, cache):
+    """
+    Add the /images routes serving mugshots and team logos to the Flask server.
+
+    Args:
+        server (flask.Flask): the app's Flask server.
+        cache (ImageCache): image cache.
+    """
+    @server.route('/images/mugs/<int:season>/<team>/<int:player_id>.png')
+    def player_mug(season, team, player_id):
+        if not TEAM_CODE.match(team):
+            flask.abort(404)
+        return image_response(cache, get_mug_path(season, team, player_id), 'mug')
+
+    @server.route('/images/logos/<team>.svg')
+    def team_logo(team):
+        if not TEAM_CODE.match(team):
+            flask.abort(404)
+        return image_response(cache, get_logo_path(team), 'logo')
+
+
+def get_season_image_paths(file_path, season):
+    """
+    Return every mugshot and logo path needed for a season's players.
+
+    Args:
+        file_path (str): path of the season's data file.
+        season (int): starting year of the season.
+
+    Returns:
+        list: relative image paths
+    """
+    from data_cache import load_cache
+    df = load_cache(file_path)
+    players = df.loc[df['situation'] == 'all', ['playerId', 'team']].drop_duplicates()
+    paths = [get_logo_path(team) for team in sorted(players['team'].unique())]
+    paths += [get_mug_path(season, team, player_id) for player_id, team in players.itertuples(index=False)]
+    return paths
+
+
+def prefetch(cache, paths, workers=8):
+    """
+    Download every image not yet cached.
+
+    Args:
+        cache (ImageCache): image cache.
+        paths (list): relative image paths.
+        workers (int): concurrent downloads.
+
+    Returns:
+        int: number of images available in the cache
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        return sum(content is not None for content in pool.map(cache.get, paths))
+
+
+def import_images(cache, source_dir):
+    """
+    Copy images from a directory laid out like the cache, for offline seeding.
+
+    Args:
+        cache (ImageCache): image cache.
+        source_dir (str): directory to import from.
+
+    Returns:
+        int: number of images imported
+    """
+    count = 0
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if os.path.splitext(name)[1] not in MIMETYPES:
+                continue
+            source = os.path.join(root, name)
+            with open(source, 'rb') as f:
+                cache.put(os.path.relpath(source, source_dir), f.read())
+            count += 1
+    return count
+
+
+if __name__ == '__main__':
+    from config import season_data_dir
+    parser = argparse.ArgumentParser(description='Fill the local image cache.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    prefetch_parser = commands.add_parser('prefetch', help='download images for seasons on disk')
+    prefetch_parser.add_argument('seasons', nargs='*', type=int, help='seasons to fetch, all by default')
+    import_parser = commands.add_parser('import', help='copy images from a directory')
+    import_parser.add_argument('source', help='directory laid out like the cache')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        cache = ImageCache(image_cache_path, image_cache_max_mb, offline=True)
+        print(f'{import_images(cache, args.source)} images imported into {image_cache_path}')
+    else:
+        cache = ImageCache(image_cache_path, image_cache_max_mb, timeout=image_fetch_timeout)
+        seasons = args.seasons or sorted(int(entry) for entry in os.listdir(season_data_dir) if entry.isdigit())
+        for season in seasons:
+            paths = get_season_image_paths(os.path.join(season_data_dir, str(season), 'skaters.csv'), season)
+            print(f'{season}: {prefetch(cache, paths)}/{len(paths)} images cached')
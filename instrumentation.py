@@ -0,0 +1,429 @@
+"""
+Callback instrumentation for the NHL Stats Dashboard.
+
+instrument_callback wraps a Dash callback to record its duration, the time
+spent in each phase() block it runs through, the time Dash then spends
+serializing the response and the response size. Everything is kept in
+histograms exposed in the Prometheus text format at /metrics.
+
+Under gunicorn every worker keeps its own histograms. With
+enable_multiprocess() each worker also writes them to a directory shared by
+all workers, and /metrics merges the files of every worker, so a scrape
+reports the whole server whichever worker answers it.
+
+With the sampling profiler enabled, instrumented callbacks are sampled while
+they run and the stacks of slow ones are written as collapsed stack files
+(one 'frame;frame;frame count' line per stack), ready for flamegraph.pl or
+speedscope.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import flask
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+_local = threading.local()
+logger = logging.getLogger(__name__)
+multiprocess_dir = None
+
+
+def enable_multiprocess(directory):
+    """
+    Aggregate metrics across the worker processes of a server.
+
+    Call once in the parent process before the workers fork; the files left
+    by a previous run are cleared.
+
+    Args:
+        directory (str): directory shared by every worker.
+    """
+    global multiprocess_dir
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    multiprocess_dir = directory
+
+
+def is_process_running(pid):
+    """
+    Return whether a process is still running.
+
+    Args:
+        pid (int): process ID.
+
+    Returns:
+        bool: True if the process exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProcessSnapshots:
+    """
+    One process's metric values, readable by every worker process.
+
+    Without enable_multiprocess() only this process's values are read. With
+    it, a background thread writes the values to '<name>-<pid>.json' in the
+    shared directory, at most once per interval and only after they changed,
+    and read() returns the values of every process. Files of exited workers
+    are kept, so counters summed over them never go backwards when the
+    workers are restarted.
+
+    Args:
+        name (str): snapshot name, one per kind of metric.
+        collect (function): returns this process's values as a JSON-serializable dict.
+        interval (float): seconds between writes.
+    """
+
+    def __init__(self, name, collect, interval=1.0):
+        self.name = name
+        self.collect = collect
+        self.interval = interval
+        self.changed = threading.Event()
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def mark_changed(self):
+        """
+        Note that this process's values changed, so they are written out.
+        """
+        if multiprocess_dir is None:
+            return
+        self.changed.set()
+        # the writer thread does not survive a fork, so each worker starts its own
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.pid = os.getpid()
+                    threading.Thread(target=self._run, name=f'{self.name}-snapshots', daemon=True).start()
+                    atexit.register(self._flush)
+
+    def read(self):
+        """
+        Return the values of every process, with this process's current ones.
+
+        Returns:
+            dict: pid -> values
+        """
+        values = {}
+        if multiprocess_dir is not None:
+            prefix = f'{self.name}-'
+            for file_name in os.listdir(multiprocess_dir):
+                if not (file_name.startswith(prefix) and file_name.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(multiprocess_dir, file_name)) as f:
+                        values[int(file_name[len(prefix):-len('.json')])] = json.load(f)
+                except (OSError, ValueError):
+                    continue
+        values[os.getpid()] = self.collect()
+        return values
+
+    def _run(self):
+        while True:
+            self.changed.wait()
+            self._flush()
+            time.sleep(self.interval)
+
+    def _flush(self):
+        if not self.changed.is_set():
+            return
+        self.changed.clear()
+        path = os.path.join(multiprocess_dir, f'{self.name}-{os.getpid()}.json')
+        try:
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(self.collect(), f)
+            os.replace(f'{path}.tmp', path)
+        except OSError as error:
+            logger.warning('metrics snapshot %s not written: %s', path, error)
+
+
+class Histogram:
+    """
+    Thread-safe labelled histogram rendered in the Prometheus text format.
+
+    Args:
+        name (str): metric name.
+        description (str): help text.
+        buckets (tuple): upper bounds of the buckets, ascending.
+    """
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Record one value.
+
+        Args:
+            value (float): observed value.
+            **labels: label values of the series.
+        """
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        """
+        Return a copy of every series.
+
+        Returns:
+            list: [labels, series] pairs, labels as [name, value] pairs
+        """
+        with self.lock:
+            return [[list(key), {**series, 'counts': list(series['counts'])}] for key, series in self.series.items()]
+
+    def render(self, snapshots=None):
+        """
+        Return the histogram in the Prometheus text format.
+
+        Args:
+            snapshots (list): snapshot() results to sum, this process's series if None.
+
+        Returns:
+            list: exposition lines
+        """
+        merged = {}
+        for snapshot in [self.snapshot()] if snapshots is None else snapshots:
+            for key, series in snapshot:
+                key = tuple(map(tuple, key))
+                total = merged.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+                total['counts'] = [a + b for a, b in zip(total['counts'], series['counts'])]
+                total['sum'] += series['sum']
+                total['count'] += series['count']
+
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for key, series in sorted(merged.items()):
+            labels = ','.join(f'{name}="{value}"' for name, value in key)
+            prefix = f'{labels},' if labels else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {series["sum"]}')
+            lines.append(f'{self.name}_count{{{labels}}} {series["count"]}')
+        return lines
+
+
+CALLBACK_SECONDS = Histogram('dash_callback_seconds', 'Time spent inside a Dash callback.', SECONDS_BUCKETS)
+PHASE_SECONDS = Histogram('dash_callback_phase_seconds', 'Time spent in each phase of a Dash callback.', SECONDS_BUCKETS)
+RESPONSE_BYTES = Histogram('dash_callback_response_bytes', 'Size of Dash callback responses.', BYTES_BUCKETS)
+HISTOGRAMS = [CALLBACK_SECONDS, PHASE_SECONDS, RESPONSE_BYTES]
+HISTOGRAM_SNAPSHOTS = ProcessSnapshots('histograms', lambda: {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS})
+
+
+class SamplingProfiler:
+    """
+    Background sampler of the stacks of threads running instrumented callbacks.
+
+    Args:
+        interval (float): seconds between samples.
+        slow_seconds (float): callbacks at least this slow have their stacks written out.
+        directory (str): directory of the collapsed stack files.
+    """
+
+    def __init__(self, interval, slow_seconds, directory):
+        self.interval = interval
+        self.slow_seconds = slow_seconds
+        self.directory = directory
+        self.active = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Start sampling the calling thread.
+        """
+        with self.lock:
+            self.active[threading.get_ident()] = Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self.thread.start()
+
+    def stop(self, name, elapsed):
+        """
+        Stop sampling the calling thread and write its stacks if the callback was slow.
+
+        Args:
+            name (str): callback name.
+            elapsed (float): callback duration in seconds.
+
+        Returns:
+            str: path of the collapsed stack file, or None
+        """
+        with self.lock:
+            stacks = self.active.pop(threading.get_ident(), None)
+        if not stacks or elapsed < self.slow_seconds:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}-{int(elapsed * 1000)}ms.folded')
+        with open(path, 'w') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in stacks.most_common())
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, stacks in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own:
+                        stacks[collapse_stack(frame)] += 1
+
+
+def collapse_stack(frame):
+    """
+    Return a stack as 'file:function;...' from the outermost frame in.
+
+    Args:
+        frame (frame): innermost frame.
+
+    Returns:
+        str: collapsed stack
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+profiler = None
+
+
+def enable_profiler(interval, slow_seconds, directory):
+    """
+    Turn on the sampling profiler for every instrumented callback.
+
+    Args:
+        interval (float): seconds between samples.
+        slow_seconds (float): callbacks at least this slow have their stacks written out.
+        directory (str): directory of the collapsed stack files.
+    """
+    global profiler
+    profiler = SamplingProfiler(interval, slow_seconds, directory)
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a block as one phase of the instrumented callback running on this thread.
+
+    Outside an instrumented callback the block runs untimed.
+
+    Args:
+        name (str): phase name (e.g., 'filter', 'figure_build').
+    """
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+
+
+def instrument_callback(name):
+    """
+    Decorate a Dash callback to record its duration and phase timings.
+
+    Apply below @app.callback so Dash registers the instrumented function.
+
+    Args:
+        name (str): callback name used as the metric label.
+
+    Returns:
+        function: the decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _local.timings = {}
+            sampler = profiler
+            if sampler:
+                sampler.start()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                timings, _local.timings = _local.timings, None
+                CALLBACK_SECONDS.observe(elapsed, callback=name)
+                for phase_name, seconds in timings.items():
+                    PHASE_SECONDS.observe(seconds, callback=name, phase=phase_name)
+                HISTOGRAM_SNAPSHOTS.mark_changed()
+                if sampler:
+                    sampler.stop(name, elapsed)
+                if flask.has_request_context():
+                    # the response phase and size are recorded once Dash has serialized the output
+                    flask.g.instrumented_callback = (name, time.perf_counter())
+        return wrapper
+    return decorator
+
+
+def register_metrics(server, gauges=None):
+    """
+    Record response timings and sizes on the Flask server and add the /metrics route.
+
+    Args:
+        server (flask.Flask): the app's Flask server.
+        gauges (dict): metric prefix -> function returning a dict of numeric values,
+            exposed as '<prefix>_<key>' gauges (e.g., response cache stats).
+    """
+    gauges = gauges or {}
+
+    @server.after_request
+    def record_response(response):
+        instrumented = flask.g.pop('instrumented_callback', None)
+        if instrumented:
+            name, returned = instrumented
+            PHASE_SECONDS.observe(time.perf_counter() - returned, callback=name, phase='response')
+            RESPONSE_BYTES.observe(response.calculate_content_length() or 0, callback=name)
+            HISTOGRAM_SNAPSHOTS.mark_changed()
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        lines = []
+        processes = HISTOGRAM_SNAPSHOTS.read().values()
+        for histogram in HISTOGRAMS:
+            lines.extend(histogram.render([snapshot.get(histogram.name, []) for snapshot in processes]))
+        for prefix, collect in gauges.items():
+            for key, value in collect().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'# TYPE {prefix}_{key} gauge')
+                    lines.append(f'{prefix}_{key} {value}')
+        return flask.Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
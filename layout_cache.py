@@ -0,0 +1,197 @@
+"""
+Pre-serialized layout responses for the NHL Stats Dashboard.
+
+Dash serializes app.layout to JSON on every page load. CachedLayoutDash
+serializes it once, keeps a gzip-compressed copy and tags it with an ETag so
+repeat visitors get a 304 and new ones a compressed body.
+
+With static_layout, a layout function is treated as a builder that runs once,
+on first use, instead of at import. With layout_snapshot, the serialized
+layout is read from a snapshot written at deploy time, as long as its version
+matches; run `python layout_cache.py` after the data cache is built to write it.
+The layout is validated when the snapshot is written, so a server started
+from a matching snapshot never builds it.
+"""
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import sys
+
+import flask
+from dash import Dash, html
+from dash._utils import to_json
+from dash._validate import validate_layout
+
+
+def get_source_digest(paths):
+    """
+    Return a digest of source files, used to version layout snapshots.
+
+    Args:
+        paths (list): paths of the files the layout is built from.
+
+    Returns:
+        str: sha1 hex digest
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def make_payload(body):
+    """
+    Return a serialized response with its gzip-compressed copy and its ETag.
+
+    Args:
+        body (bytes): serialized JSON.
+
+    Returns:
+        dict: body, gzip_body and etag
+    """
+    return {'body': body, 'gzip_body': gzip.compress(body, compresslevel=9), 'etag': hashlib.sha1(body).hexdigest()}
+
+
+def payload_response(payload):
+    """
+    Return the response for a payload from make_payload: a 304 when the browser's copy is current,
+    otherwise the body, gzip-compressed if the browser accepts it.
+
+    Args:
+        payload (dict): body, gzip_body and etag.
+
+    Returns:
+        flask.Response: the response for the current request
+    """
+    if payload['etag'] in flask.request.if_none_match:
+        response = flask.Response(status=304)
+    elif 'gzip' in flask.request.accept_encodings:
+        response = flask.Response(payload['gzip_body'], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = flask.Response(payload['body'], mimetype='application/json')
+    response.set_etag(payload['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class CachedLayoutDash(Dash):
+    """
+    Dash app that serves its layout from a pre-serialized, compressed payload.
+
+    The payload is rebuilt whenever app.layout is assigned a new value.
+
+    Args:
+        static_layout (bool): call a layout function once and reuse its result.
+        layout_snapshot (str): path prefix of the deploy-time layout snapshot, or None.
+        layout_version (str): version the snapshot must match (e.g., data and source digests).
+    """
+
+    _layout_payload = None
+    _built_layout = None
+
+    def __init__(self, *args, static_layout=False, layout_snapshot=None, layout_version=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.static_layout = static_layout
+        self.layout_snapshot = layout_snapshot
+        self.layout_version = layout_version
+
+    def _layout_value(self):
+        if not (self.static_layout and self._layout_is_function):
+            return super()._layout_value()
+        if self._built_layout is None or self._built_layout[0] is not self._layout:
+            payload = self._layout_payload
+            if payload is not None and payload['snapshot'] and payload['layout'] is self._layout:
+                # the snapshot was validated when it was written; only Dash's startup check asks for the layout
+                return html.Div()
+            self._built_layout = (self._layout, super()._layout_value())
+        return self._built_layout[1]
+
+    def _setup_server(self):
+        # read the snapshot before Dash validates the layout, so a matching one skips the build
+        if self.static_layout and self._layout_is_function:
+            self.get_layout_payload()
+        super()._setup_server()
+
+    def reset_layout(self):
+        """
+        Drop the built and serialized layout so the next page load rebuilds it (e.g., after a data reload).
+        """
+        self._built_layout = None
+        self._layout_payload = None
+
+    def get_layout_payload(self, use_snapshot=True):
+        """
+        Return the serialized layout, its gzip-compressed copy and its ETag.
+
+        Args:
+            use_snapshot (bool): read the deploy-time snapshot if it matches.
+
+        Returns:
+            dict: body, gzip_body and etag of the current layout
+        """
+        layout = self._layout
+        if self._layout_payload is None or self._layout_payload['layout'] is not layout:
+            payload = self.read_layout_snapshot() if use_snapshot and self._layout_payload is None else None
+            snapshot = payload is not None
+            if payload is None:
+                payload = make_payload(to_json(self._layout_value()).encode())
+            self._layout_payload = {'layout': layout, 'snapshot': snapshot, **payload}
+        return self._layout_payload
+
+    def read_layout_snapshot(self):
+        """
+        Return the payload stored in the layout snapshot, or None if it is missing or stale.
+
+        Returns:
+            dict: body, gzip_body and etag, or None
+        """
+        if not self.layout_snapshot:
+            return None
+        try:
+            with open(f'{self.layout_snapshot}.json') as f:
+                meta = json.load(f)
+            if meta.get('version') != self.layout_version:
+                return None
+            with open(f'{self.layout_snapshot}.gz', 'rb') as f:
+                gzip_body = f.read()
+        except (OSError, ValueError):
+            return None
+        return {'body': gzip.decompress(gzip_body), 'gzip_body': gzip_body, 'etag': meta['etag']}
+
+    def write_layout_snapshot(self):
+        """
+        Validate and serialize the layout and atomically write it as the layout snapshot.
+
+        Returns:
+            str: ETag of the written layout
+        """
+        self._layout_payload = None
+        validate_layout(self._layout, self._layout_value())
+        payload = self.get_layout_payload(use_snapshot=False)
+        os.makedirs(os.path.dirname(os.path.abspath(self.layout_snapshot)), exist_ok=True)
+        for suffix, content, mode in (
+            ('.gz', payload['gzip_body'], 'wb'),
+            ('.json', json.dumps({'version': self.layout_version, 'etag': payload['etag']}), 'w'),
+        ):
+            tmp_path = f'{self.layout_snapshot}{suffix}.{os.getpid()}'
+            with open(tmp_path, mode) as f:
+                f.write(content)
+            os.replace(tmp_path, f'{self.layout_snapshot}{suffix}')
+        return payload['etag']
+
+    def serve_layout(self):
+        if callable(self._layout) and not self.static_layout:
+            return super().serve_layout()
+
+        return payload_response(self.get_layout_payload())
+
+
+if __name__ == '__main__':
+    module = importlib.import_module(sys.argv[1] if len(sys.argv) > 1 else 'app')
+    etag = module.app.write_layout_snapshot()
+    print(f'layout snapshot {module.app.layout_snapshot} written (etag {etag})')
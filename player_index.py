@@ -0,0 +1,49 @@
+"""
+Player lookup index for the NHL Stats Dashboard.
+
+Built once at load time from the situation=='all' rows so sidebar lookups are
+dictionary hits instead of boolean-mask scans over the whole frame.
+"""
+import sys
+
+# Fields copied onto each player card record
+card_fields = ['name', 'team', 'position', 'games_played', 'I_F_points', 'I_F_goals', 'I_F_primaryAssists', 'I_F_secondaryAssists']
+
+
+class PlayerIndex:
+    """
+    Player card records keyed by playerId.
+
+    Names are not unique across players, so playerId is the key everywhere
+    and names are only used for display.
+
+    Args:
+        df (pd.DataFrame): DataFrame of all player data.
+    """
+
+    def __init__(self, df):
+        frame = df[df['situation'] == 'all'].set_index('playerId')
+        self.cards = {}
+        columns = {field: frame[field].tolist() for field in card_fields}
+        for i, player_id in enumerate(frame.index.tolist()):
+            self.cards[player_id] = {field: columns[field][i] for field in card_fields}
+        self.nbytes = sys.getsizeof(self.cards) + sum(
+            sys.getsizeof(card) + sum(map(sys.getsizeof, card.values())) for card in self.cards.values())
+
+    def __contains__(self, player_id):
+        return player_id in self.cards
+
+    def __len__(self):
+        return len(self.cards)
+
+    def card(self, player_id):
+        """
+        Return the card record of a player.
+
+        Args:
+            player_id (int): player ID
+
+        Returns:
+            dict: card fields of the player
+        """
+        return self.cards[player_id]
@@ -0,0 +1,359 @@
+"""
+Cache of callback responses for the NHL Stats Dashboard.
+
+Responses live in an in-process LRU and, when a shared backend is given, in a
+tier every gunicorn worker reads, so a view built by one worker is served by
+all of them. The shared tier is a directory of JSON files or a
+Redis-compatible server (Redis, Valkey, KeyDB...).
+
+Entries are keyed on the callback, its normalized inputs and the dataset
+version, and expire after a configurable TTL in both tiers.
+
+Hit, miss and eviction counters are kept per process and shared through
+instrumentation.ProcessSnapshots, so stats() covers every gunicorn worker.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from dash._utils import to_json
+
+from instrumentation import ProcessSnapshots, is_process_running
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts):
+    """
+    Return a canonical hash for a response's inputs.
+
+    Lists and tuples are sorted so the same player set always gives the same key.
+
+    Args:
+        *parts: JSON-serializable inputs of the response (callback name, data version, inputs).
+
+    Returns:
+        str: sha1 hex digest
+    """
+    canonical = [sorted(part) if isinstance(part, (list, tuple)) else part for part in parts]
+    return hashlib.sha1(json.dumps(canonical, separators=(',', ':'), default=str).encode()).hexdigest()
+
+
+class FileBackend:
+    """
+    Shared tier of serialized responses in a directory, evicted least recently used first.
+
+    Each file holds the expiry time on its first line and the JSON response after it.
+
+    Args:
+        directory (str): directory of the response files.
+        maxsize (int): number of responses kept on disk.
+    """
+
+    def __init__(self, directory, maxsize=2048):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.evictions = 0
+        self.errors = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """
+        Return a stored response, or None if it is missing or expired.
+
+        Args:
+            key (str): key from make_key.
+
+        Returns:
+            bytes: serialized response or None
+        """
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, _, body = f.read().partition(b'\n')
+            if float(expires) and float(expires) < time.time():
+                return None
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            return None
+        return body
+
+    def set(self, key, body, ttl):
+        """
+        Store a response.
+
+        Args:
+            key (str): key from make_key.
+            body (bytes): serialized response.
+            ttl (int): seconds the response stays valid (0 = no expiry).
+        """
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(f'{time.time() + ttl if ttl else 0}\n'.encode())
+                f.write(body)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except OSError:
+            self.errors += 1
+
+    def _evict(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        if len(files) <= self.maxsize:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.maxsize]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.evictions += 1
+
+
+class RedisBackend:
+    """
+    Shared tier of serialized responses on a Redis-compatible server.
+
+    Expiry is left to the server (SET ... EX). A server that is down or slow
+    turns lookups into misses instead of failing the callback.
+
+    Args:
+        client (redis.Redis): client of the server.
+        prefix (str): prefix of every key written.
+    """
+
+    def __init__(self, client, prefix='nhl-dash:'):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+        self.errors = 0
+
+    def get(self, key):
+        """
+        Return a stored response, or None if it is missing or the server is unavailable.
+
+        Args:
+            key (str): key from make_key.
+
+        Returns:
+            bytes: serialized response or None
+        """
+        try:
+            return self.client.get(self.prefix + key)
+        except Exception as error:
+            self._failed('get', error)
+            return None
+
+    def set(self, key, body, ttl):
+        """
+        Store a response.
+
+        Args:
+            key (str): key from make_key.
+            body (bytes): serialized response.
+            ttl (int): seconds the response stays valid (0 = no expiry).
+        """
+        try:
+            self.client.set(self.prefix + key, body, ex=ttl or None)
+        except Exception as error:
+            self._failed('set', error)
+
+    def _failed(self, operation, error):
+        self.errors += 1
+        if self.errors == 1 or self.errors % 1000 == 0:
+            logger.warning('response cache %s failed (%d errors so far): %s', operation, self.errors, error)
+
+
+def create_backend(kind, path, disk_size, redis_url, timeout=0.05):
+    """
+    Return the shared tier named in the config.
+
+    The redis package is only needed for the 'redis' backend.
+
+    Args:
+        kind (str): 'file', 'redis' or None for no shared tier.
+        path (str): directory of the file backend.
+        disk_size (int): responses kept by the file backend.
+        redis_url (str): URL of the Redis-compatible server (e.g., 'redis://localhost:6379/0').
+        timeout (float): seconds a Redis request may take before it counts as a miss.
+
+    Returns:
+        FileBackend or RedisBackend, or None
+    """
+    if kind == 'file':
+        return FileBackend(path, disk_size)
+    if kind == 'redis':
+        import redis
+        return RedisBackend(redis.Redis.from_url(redis_url, socket_timeout=timeout, socket_connect_timeout=timeout))
+    if kind:
+        raise ValueError(f'unknown response cache backend: {kind!r}')
+    return None
+
+
+class ResponseCache:
+    """
+    Two-tier LRU cache of callback responses, with hit ratios per callback.
+
+    The in-process tier keeps the response objects themselves, so a hit costs
+    a dictionary lookup. The shared tier keeps them serialized as JSON.
+
+    Args:
+        maxsize (int): number of responses held in memory.
+        ttl (int): seconds a response stays valid (0 = until evicted).
+        shared (FileBackend or RedisBackend): shared tier, or None for memory only.
+    """
+
+    def __init__(self, maxsize=256, ttl=0, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+        self.callbacks = {}
+        self.snapshots = ProcessSnapshots('response_cache', self._counters)
+
+    def get(self, name, key):
+        """
+        Return the cached response for a key, or None on a miss.
+
+        Args:
+            name (str): callback name, used for the per-callback hit ratio.
+            key (str): key from make_key.
+
+        Returns:
+            the response, or None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (not entry[0] or entry[0] > time.time()):
+                self.entries.move_to_end(key)
+                self._count(name, 'hits')
+                return entry[1]
+
+        body = self.shared.get(key) if self.shared else None
+        response = None if body is None else json.loads(body)
+        with self.lock:
+            if response is None:
+                self._count(name, 'misses')
+                return None
+            self._count(name, 'shared_hits')
+            self._remember(key, response)
+        return response
+
+    def set(self, name, key, response):
+        """
+        Store a response in both tiers.
+
+        Args:
+            name (str): callback name.
+            key (str): key from make_key.
+            response: JSON-serializable callback output (Dash components included).
+        """
+        with self.lock:
+            self._remember(key, response)
+        if self.shared:
+            self.shared.set(key, to_json(response).encode(), self.ttl)
+
+    def get_or_build(self, name, key, build):
+        """
+        Return the cached response for a key, building and storing it on a miss.
+
+        Args:
+            name (str): callback name.
+            key (str): key from make_key.
+            build (callable): returns the response when called.
+
+        Returns:
+            the response
+        """
+        response = self.get(name, key)
+        if response is None:
+            response = build()
+            self.set(name, key, response)
+        return response
+
+    def clear(self):
+        """
+        Drop every response from the in-process tier.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Return hit, miss and eviction counters and hit ratios summed over every worker process.
+
+        Counters include workers that have exited; the size only counts the
+        entries of running ones.
+
+        Returns:
+            dict: cache metrics, with a '<callback>_hit_ratio' entry per callback
+        """
+        metrics = dict.fromkeys(self.metrics, 0)
+        callbacks = {}
+        shared = {'shared_evictions': 0, 'shared_errors': 0}
+        size = 0
+        for pid, counters in self.snapshots.read().items():
+            for outcome, count in counters['metrics'].items():
+                metrics[outcome] += count
+            for name, counts in counters['callbacks'].items():
+                totals = callbacks.setdefault(name, {'hits': 0, 'shared_hits': 0, 'misses': 0})
+                for outcome, count in counts.items():
+                    totals[outcome] += count
+            for key, count in counters['shared'].items():
+                shared[key] += count
+            if is_process_running(pid):
+                size += counters['size']
+
+        stats = {**metrics, 'size': size, 'hit_ratio': get_hit_ratio(metrics)}
+        for name, counts in callbacks.items():
+            stats[f"{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_hit_ratio"] = get_hit_ratio(counts)
+        if self.shared:
+            stats.update(shared)
+        return stats
+
+    def _counters(self):
+        with self.lock:
+            counters = {
+                'metrics': dict(self.metrics),
+                'callbacks': {name: dict(counts) for name, counts in self.callbacks.items()},
+                'size': len(self.entries),
+            }
+        counters['shared'] = {'shared_evictions': self.shared.evictions, 'shared_errors': self.shared.errors} if self.shared else {}
+        return counters
+
+    def _count(self, name, outcome):
+        self.metrics[outcome] += 1
+        counts = self.callbacks.setdefault(name, {'hits': 0, 'shared_hits': 0, 'misses': 0})
+        counts[outcome] += 1
+        self.snapshots.mark_changed()
+
+    def _remember(self, key, response):
+        self.entries[key] = (time.time() + self.ttl if self.ttl else 0, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.metrics['evictions'] += 1
+            self.snapshots.mark_changed()
+
+
+def get_hit_ratio(counts):
+    """
+    Return the share of lookups served from either tier.
+
+    Args:
+        counts (dict): hits, shared_hits and misses.
+
+    Returns:
+        float: hit ratio (0 when nothing was looked up)
+    """
+    lookups = counts['hits'] + counts['shared_hits'] + counts['misses']
+    return (counts['hits'] + counts['shared_hits']) / lookups if lookups else 0.0
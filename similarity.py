@@ -0,0 +1,90 @@
+"""
+Player similarity search for the NHL Stats Dashboard.
+
+Every player's situation=='all' row becomes a standardized feature vector.
+The vectors are L2-normalized and stored as one contiguous float32 matrix, so
+cosine similarity against every player is a single matrix product.
+"""
+import sys
+
+import numpy as np
+
+
+class SimilarityIndex:
+    """
+    k-nearest-neighbour index over standardized player stat vectors.
+
+    Args:
+        frame (pd.DataFrame): chart frame of all skaters, indexed by playerId.
+        stats (list): numeric stats used as features.
+        top_k (int): size of the precomputed neighbour table, 0 to answer every query live.
+        batch_size (int): players scored per matrix product when building the table.
+    """
+
+    def __init__(self, frame, stats, top_k=0, batch_size=1024):
+        self.player_ids = frame.index.to_numpy()
+        self.rows = {player_id: i for i, player_id in enumerate(self.player_ids.tolist())}
+
+        features = frame[stats].to_numpy(dtype='float64')
+        mean = np.nanmean(features, axis=0)
+        std = np.nanstd(features, axis=0)
+        std[~(std > 0)] = 1
+        features = np.nan_to_num((features - mean) / std)
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.vectors = np.ascontiguousarray(features / norms, dtype='float32')
+
+        self.table = None
+        self.table_scores = None
+        if top_k:
+            self.table, self.table_scores = self._build_table(top_k, batch_size)
+        self.nbytes = sys.getsizeof(self.rows) + sum(array.nbytes for array in (self.player_ids, self.vectors, self.table, self.table_scores) if array is not None)
+
+    def _top_k(self, scores, rows, k):
+        # drop each query player from its own results
+        scores[np.arange(len(rows)), rows] = -np.inf
+        k = min(k, scores.shape[1] - 1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def _build_table(self, k, batch_size):
+        neighbours, scores = [], []
+        for start in range(0, len(self.vectors), batch_size):
+            rows = np.arange(start, min(start + batch_size, len(self.vectors)))
+            batch_neighbours, batch_scores = self._top_k(self.vectors[rows] @ self.vectors.T, rows, k)
+            neighbours.append(batch_neighbours.astype('int32'))
+            scores.append(batch_scores)
+        return np.vstack(neighbours), np.vstack(scores)
+
+    def similar_batch(self, player_ids, k):
+        """
+        Return the k most similar players for each of several players.
+
+        Args:
+            player_ids (list): player IDs to query.
+            k (int): number of neighbours per player.
+
+        Returns:
+            list: one list of (player ID, cosine similarity) pairs per queried player, most similar first
+        """
+        rows = np.array([self.rows[player_id] for player_id in player_ids], dtype='int64')
+        if self.table is not None and k <= self.table.shape[1]:
+            neighbours, scores = self.table[rows, :k], self.table_scores[rows, :k]
+        else:
+            neighbours, scores = self._top_k(self.vectors[rows] @ self.vectors.T, rows, k)
+        return [list(zip(self.player_ids[n].tolist(), s.tolist())) for n, s in zip(neighbours, scores)]
+
+    def similar(self, player_id, k):
+        """
+        Return the k most similar players to a player.
+
+        Args:
+            player_id (int): player ID
+            k (int): number of neighbours.
+
+        Returns:
+            list: (player ID, cosine similarity) pairs, most similar first
+        """
+        return self.similar_batch([player_id], k)[0]
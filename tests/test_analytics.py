@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import StatsTable, parse_filter_query, team_rollup
+
+
+@pytest.mark.parametrize('query, terms', [
+    ('{I_F_points} s> 50', [('I_F_points', 'gt', '50', True)]),
+    ('{I_F_points} s= 50', [('I_F_points', 'eq', '50', True)]),
+    ('{I_F_points} i<= 50', [('I_F_points', 'le', '50', False)]),
+    ('{I_F_points} s!= 50', [('I_F_points', 'ne', '50', True)]),
+    ('{I_F_points} > 50', [('I_F_points', 'gt', '50', True)]),
+    ('{team} s= TOR', [('team', 'eq', 'TOR', True)]),
+    ('{team} i= "tor"', [('team', 'eq', 'tor', False)]),
+    ('{name} icontains mcdavid', [('name', 'contains', 'mcdavid', False)]),
+    ('{name} scontains "Connor"', [('name', 'contains', 'Connor', True)]),
+    ('{I_F_points} s>= 50 && {team} s= EDM', [('I_F_points', 'ge', '50', True), ('team', 'eq', 'EDM', True)]),
+    ('', []),
+])
+def test_parse_filter_query(query, terms):
+    assert parse_filter_query(query) == terms
+
+
+@pytest.fixture
+def table():
+    frame = pd.DataFrame({
+        'name': ['Connor McDavid', 'Auston Matthews', 'Leon Draisaitl'],
+        'team': ['EDM', 'TOR', 'EDM'],
+        'I_F_points': [132.0, 107.0, np.nan],
+    }, index=pd.Index([8478402, 8479318, 8477934], name='playerId'))
+    return StatsTable(frame, ['name', 'team'], ['I_F_points'])
+
+
+@pytest.mark.parametrize('query, names', [
+    ('{I_F_points} s> 110', ['Connor McDavid']),
+    ('{I_F_points} s= 107', ['Auston Matthews']),
+    ('{team} s= EDM', ['Connor McDavid', 'Leon Draisaitl']),
+    ('{team} s= edm', []),
+    ('{team} i= edm', ['Connor McDavid', 'Leon Draisaitl']),
+    ('{name} icontains connor', ['Connor McDavid']),
+    ('{I_F_points} s>= 100 && {team} s= EDM', ['Connor McDavid']),
+])
+def test_filter_mask(table, query, names):
+    mask = table.filter_mask(query)
+    assert table.text['name'][mask].tolist() == names
+
+
+def test_team_rollup_icetime_is_team_time_on_ice():
+    rows = [
+        (player, 'TOR', situation, icetime * 60)
+        for player in range(10)
+        for situation, icetime in (('5on5', 50), ('5on4', 5), ('4on5', 4), ('other', 1), ('all', 60))
+    ]
+    df = pd.DataFrame(rows, columns=['playerId', 'team', 'situation', 'icetime'])
+    rollup = team_rollup(df, ['icetime'], {}, 'Teams', {'5on5': 5, '5on4': 5, '4on5': 4, 'other': 5})
+    minutes = dict(zip(rollup['situation'], rollup['icetime'] / 60))
+    assert minutes == {'5on5': 100, '5on4': 10, '4on5': 10, 'other': 2, 'all': 122}
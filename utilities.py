@@ -1,17 +1,28 @@
-from dash import html, dcc, dash_table, Input, Output, ctx, Patch
+from dash import html, dcc, dash_table, Input, Output, State, ALL, ctx, Patch, no_update, clientside_callback, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
+import flask
 import pandas as pd
-import plotly.io as pio
-import plotly.express as px
 import plotly.graph_objects as go
-import textwrap
-from config import teams_color, stats_map, player_profile, styles
+from dash_bootstrap_templates import load_figure_template
+from config import teams_color, stats_map, chart_stats, styles, figure_templates, chart_themes, top_n_options, scattergl_threshold, default_team_color, card_percentile_stats, leaderboard_rows, similar_players_count, stats_table_text_columns, stats_table_page_size, team_tab, stat_groups, compact_max_decimals
+from data_cache import load_cache, read_csv, file_digest, compact_frame, get_stat_decimals
+from response_cache import make_key
+from layout_cache import payload_response
+from analytics import exact_values
+from instrumentation import instrument_callback, phase
 import json
+import base64
+import gzip
+import numpy as np
+from functools import lru_cache
 
 
 def load_data(file_path):
     """
-    Load data from a CSV file with error handling.
+    Load data from the columnar cache of a CSV file, falling back to the CSV itself.
+
+    The cache is rebuilt when the CSV changes (see data_cache.py).
 
     Args:
         file_path (str): The path to the CSV file.
@@ -23,85 +34,95 @@ def load_data(file_path):
         Exception: If the file is not found, empty, or cannot be parsed.
     """
     try:
-        df = pd.read_csv(file_path)
+        return load_cache(file_path)
+    except (OSError, ValueError, KeyError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        pass
+    try:
+        df = compact_frame(read_csv(file_path))
     except FileNotFoundError:
         raise Exception(f"The data file '{file_path}' was not found.")
     except pd.errors.EmptyDataError:
         raise Exception('The data file is empty.')
     except pd.errors.ParserError:
         raise Exception('Error parsing the data file.')
+    df.attrs['version'] = file_digest(file_path)
     return df
 
-def format_stat_name(stat_name):
+def get_team_colorscale():
     """
-    Format a statistic name to be more readable.
+    Return the team code of every team and a discrete colorscale mapping codes to team colors.
 
-    Args:
-        stat_name (str): The statistic name in snake_case.
+    Markers send one small integer per point instead of a hex string; teams
+    missing from teams_color share the last code.
 
     Returns:
-        str: The formatted statistic name.
+        dict: team abbreviation -> code, list: plotly colorscale
     """
-    return stats_map[stat_name]
+    colors = list(teams_color.values()) + [default_team_color]
+    codes = {team: code for code, team in enumerate(teams_color)}
+    colorscale = []
+    for code, color in enumerate(colors):
+        colorscale.append([code / len(colors), color])
+        colorscale.append([(code + 1) / len(colors), color])
+    return codes, colorscale
 
+team_codes, team_colorscale = get_team_colorscale()
 
-
-def get_player_id(player_name, df):
+def format_stat_name(stat_name):
     """
-    Return the player ID given a player name
+    Format a statistic name to be more readable.
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandas dataframe of all player data
+        stat_name (str): The statistic name in snake_case.
 
     Returns:
-        str: player ID
+        str: The formatted statistic name.
     """
-    player_id = df.loc[(df['name']==player_name, 'playerId')].iloc[0]
-    return player_id
+    return stats_map[stat_name]
 
-def get_player_team(player_name, df):
+
+
+def get_player_team(player_id, index):
     """
-    Return the team abbreviation of a player given a player name
+    Return the team abbreviation of a player given a player ID
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandas dataframe of all player data
+        player_id (int): player ID
+        index (PlayerIndex): index of all player data
 
     Returns:
         str: team abbreviation of player
     """
-    team_abbr = df.loc[(df['name']==player_name, 'team')].iloc[0]
-    return team_abbr
+    return index.card(player_id)['team']
 
-def get_player_mug(player_name, df):
+def get_player_mug(player_id, index, season):
     """
     Return the player mugshot (profile picture) link as a string
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandast dataframe of all player data
+        player_id (int): player ID
+        index (PlayerIndex): index of all player data
+        season (int): starting year of the season (e.g., 2023).
 
     Returns:
-        str: url link of player mugshot
+        str: url link of player mugshot, served by the local image cache
     """
-    player_id = get_player_id(player_name, df)
-    player_team = get_player_team(player_name, df)
-    return f'https://assets.nhle.com/mugs/nhl/20242025/{player_team}/{player_id}.png'
+    player_team = get_player_team(player_id, index)
+    return f'/images/mugs/{season}/{player_team}/{player_id}.png'
 
-def get_player_team_logo(player_name, df):
+def get_player_team_logo(player_id, index):
     """
-    Return the team logo svg link given a player's name
+    Return the team logo svg link given a player ID
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandast dataframe of all player data
+        player_id (int): player ID
+        index (PlayerIndex): index of all player data
 
     Returns:
-        str: url link of player's team logo
+        str: url link of player's team logo, served by the local image cache
     """
-    player_team = get_player_team(player_name, df)
-    return f'https://assets.nhle.com/logos/nhl/svg/{player_team}_light.svg'
+    player_team = get_player_team(player_id, index)
+    return f'/images/logos/{player_team}.svg'
 
 def add_new_line(lst, string):
     """
@@ -119,23 +140,23 @@ def add_new_line(lst, string):
     lst.append(new_line)
     return lst
 
-def get_player_card_stats(player_name, df):
+def get_player_card_stats(player_id, index):
     """
     create the printed player stats for the last clicked on player from any scatterplot tab
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandas dataframe of all player data
+        player_id (int): player ID
+        index (PlayerIndex): index of all player data
 
     Returns:
         str: stat details formatted for <p> child
     """
-    df = df[df['name']==player_name]
-    games_played = f'Games Played: {round(df.games_played.iloc[0])}'
-    position = f'Position: {df.position.iloc[0]}'
-    points = f'Points: {round(df.I_F_points.iloc[0])}'
-    goals = f'Goals: {round(df.I_F_goals.iloc[0])}'
-    assists = f'Assists: {round(df.I_F_primaryAssists.iloc[0]+df.I_F_secondaryAssists.iloc[0])}'
+    card = index.card(player_id)
+    games_played = f'Games Played: {round(card["games_played"])}'
+    position = f'Position: {card["position"]}'
+    points = f'Points: {round(card["I_F_points"])}'
+    goals = f'Goals: {round(card["I_F_goals"])}'
+    assists = f'Assists: {round(card["I_F_primaryAssists"]+card["I_F_secondaryAssists"])}'
     paragraph = []
     paragraph = add_new_line(paragraph, games_played)
     paragraph = add_new_line(paragraph, position)
@@ -145,36 +166,58 @@ def get_player_card_stats(player_name, df):
 
     return paragraph
 
-def get_player_table(player_name, df):
+def get_ordinal(number):
     """
-    create a DataTable with all stats for selected player
+    Return a number with its English ordinal suffix (1st, 2nd, 3rd, 4th...).
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandast dataframe of all player data
+        number (int): the number
 
     Returns:
-        dash_table.DataTable: DataTable with all of the stats for the given player
+        str: ordinal
+    """
+    suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f'{number}{suffix}'
+
+def get_player_percentile_bars(player_id, ranks):
     """
-    df = df[df['name']==player_name]
-    df_dict = df = df[df['name']==player_name].transpose().to_dict('records')
+    create percentile bars of the player card stats, ranked within the player's position
 
-    return dash_table.DataTable(df_dict, style_header= {'display': 'True'}, virtualization=True, style_table={'overflowY':'scroll'})
+    Args:
+        player_id (int): player ID
+        ranks (RankTables): ranks and percentiles of every stat
 
-def player_profile_card(player_name, df):
+    Returns:
+        list: label and progress bar for each stat in card_percentile_stats
+    """
+    bars = []
+    for stat in card_percentile_stats:
+        rank = ranks.lookup(player_id, stat)
+        percentile = 0 if np.isnan(rank['position_percentile']) else round(float(rank['position_percentile']) * 100)
+        label = f"{format_stat_name(stat)}: {get_ordinal(percentile)} pct"
+        if not np.isnan(rank['position_rank']):
+            label += f" (#{int(rank['position_rank'])} of {rank['position_count']})"
+        bars.append(html.Small(label))
+        bars.append(dbc.Progress(value=percentile, className='mb-2', style={'height': '8px'}))
+    return bars
+
+def player_profile_card(player_id, index, ranks, season):
     """
     create te player profile card to be loaded to the sidebar
 
     Args:
-        player_name (str): name of player with spaces.
-        df (pd.DataFrame): pandast dataframe of all player data
+        player_id (int): player ID
+        index (PlayerIndex): index of all player data
+        ranks (RankTables): ranks and percentiles of every stat
+        season (int): starting year of the season.
 
     Returns:
         str: player name, str: url of team logo, str: url of player mugshot, list: summarized stats for player card 
     """
-    player_card_mug = get_player_mug(player_name, df)
-    player_card_team = get_player_team_logo(player_name, df)
-    player_card_stats = get_player_card_stats(player_name, df)
+    player_name = index.card(player_id)['name']
+    player_card_mug = get_player_mug(player_id, index, season)
+    player_card_team = get_player_team_logo(player_id, index)
+    player_card_stats = get_player_card_stats(player_id, index) + get_player_percentile_bars(player_id, ranks)
 
     return player_name, player_card_team, player_card_mug, player_card_stats
 
@@ -193,8 +236,10 @@ def create_sidebar(player_name):
                 html.H4(id='player_name', style=styles['name'], children=player_name),
                 html.Img(id='player_card_team', style=styles['img'], src='/assets/Cuda.png'),
                 html.Img(id='player_card_mug', style=styles['img'], src='/assets/robby.jfif'),
-                html.P(id='player_card_stats', style=styles['name'], children=[html.A('Robert Grathwohl', href='https://www.mansfieldbarracudas.com/roster/robbie-grathwohl'), ' Player Bio']),
+                html.Div(id='player_card_stats', style=styles['name'], children=[html.A('Robert Grathwohl', href='https://www.mansfieldbarracudas.com/roster/robbie-grathwohl'), ' Player Bio']),
             ],id='player_card_div', **{"data-bs-theme": "dark"}),
+            html.H5('Similar Players', className='mt-3'),
+            html.Ol(id='similar_players', style=styles['name']),
         ]),
     ], style=styles['sidebar'], id='sidebar', className='col-2 col-xl-2')
     return sidebar
@@ -204,15 +249,40 @@ def get_prop(child):
     extracts meta property given the html element id
 
     Args:
-        child (pd.DataFrame): df of selected playerf
+        child (dict): clickData of the selected point
+
+    Returns:
+        int: player ID
+    """
+    player_id = child['points'][0]['meta']
+    return player_id
+
+def get_chart_id(position):
+    """
+    Return the pattern-matching id of a position's player chart.
+
+    Args:
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
 
     Returns:
-        str: player_name
+        dict: component id
+    """
+    return {'type': 'player-chart', 'position': position.lower()}
+
+def create_sidebar_callback(app, store, response_cache):
     """
-    player_name = child['points'][0]['meta']
-    return player_name
+    Create a callback that fills the player card with the last clicked player.
 
-def create_sidebar_callback(app, df):
+    Cards are served from the response cache when any worker built the same one before.
+
+    Args:
+        app (Dash): The Dash app instance.
+        store (SeasonStore): store of every season's data.
+        response_cache (ResponseCache): cache of previously built callback responses.
+
+    Returns:
+        function: The callback function for updating the player card.
+    """
 
     @app.callback(
         [Output('player_name', 'children'),
@@ -220,47 +290,301 @@ def create_sidebar_callback(app, df):
         Output('player_card_mug', 'src'),
         Output('player_card_stats', 'children')],
         #Output('player_table', 'children')],
-        [Input(f'c-chart', 'clickData'),
-         Input(f'rw-chart', 'clickData'),
-         Input(f'lw-chart', 'clickData'),
-         Input(f'd-chart', 'clickData'),
-         Input(f'all skaters-chart', 'clickData')],
+        Input({'type': 'player-chart', 'position': ALL}, 'clickData'),
+        State('season-dropdown', 'value'),
         prevent_initial_call=True)
-    def display_click_data(clickData_c, clickData_rw, clickData_lw, clickData_d, clickData_a):
-        if ctx.triggered_id == 'c-chart':
-            player_name = get_prop(clickData_c)
-        if ctx.triggered_id == 'rw-chart':
-            player_name = get_prop(clickData_rw)
-        if ctx.triggered_id == 'lw-chart':
-            player_name = get_prop(clickData_lw)
-        if ctx.triggered_id == 'd-chart':
-            player_name = get_prop(clickData_d)
-        if ctx.triggered_id == 'all skaters-chart':
-            player_name = get_prop(clickData_a)
-        return player_profile_card(player_name, df)
+    @instrument_callback('display_click_data')
+    def display_click_data(click_data, season):
+        # charts of tabs that were never opened are not in the layout, so match whichever chart fired
+        clicked = ctx.triggered[0]['value']
+        # points of the teams chart are teams, not players
+        if not clicked or ctx.triggered_id['position'] == team_tab.lower():
+            return no_update
+        player_id = get_prop(clicked)
+        with phase('load'):
+            dataset = store.get(season)
+        with phase('cache_key'):
+            key = make_key('display_click_data', dataset.version, dataset.season, player_id)
+        with phase('card_build'):
+            return response_cache.get_or_build('display_click_data', key, lambda: player_profile_card(player_id, dataset.player_index, dataset.rank_tables, dataset.season))
         
     return display_click_data
 
-def create_tab_content(app, position, stats, top_players, df):
+def create_similar_players_callback(app, store):
+    """
+    Create a callback listing the players most similar to the last clicked player.
+
+    Args:
+        app (Dash): The Dash app instance.
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for updating the similar players list.
+    """
+    @app.callback(
+        Output('similar_players', 'children'),
+        Input({'type': 'player-chart', 'position': ALL}, 'clickData'),
+        State('season-dropdown', 'value'),
+        prevent_initial_call=True)
+    def display_similar_players(click_data, season):
+        clicked = ctx.triggered[0]['value']
+        if not clicked or ctx.triggered_id['position'] == team_tab.lower():
+            return no_update
+        dataset = store.get(season)
+        items = []
+        for player_id, score in dataset.similarity.similar(get_prop(clicked), similar_players_count):
+            card = dataset.player_index.card(player_id)
+            items.append(html.Li(f"{card['name']} ({card['position']}, {card['team']}) - {round(score * 100)}%"))
+        return items
+    return display_similar_players
+
+def create_comparison_panel():
+    """
+    create the panel comparing the players selected with box or lasso select on any chart
+
+    Returns:
+        html.Div: stat group and chart type selectors and the comparison chart
+    """
+    return html.Div([
+        html.H2('Compare Selected Players', className='text-center mb-2'),
+        html.Small('Box or lasso select players on any chart to compare them.'),
+        html.Div([
+            html.Div(dcc.Dropdown(
+                id='comparison-stat-group',
+                options=list(stat_groups),
+                value=next(iter(stat_groups)),
+                clearable=False), className='col-4'),
+            html.Div(dbc.RadioItems(
+                id='comparison-chart-type',
+                options=[{'label': 'Radar', 'value': 'radar'}, {'label': 'Parallel Coordinates', 'value': 'parallel'}],
+                value='radar',
+                inline=True), className='col-4'),
+        ], className='row justify-content-center my-2'),
+        dcc.Store(id='comparison-selection'),
+        dcc.Graph(id='comparison-chart', style=styles['graph']),
+    ], className='mt-4')
+
+def get_selected_ids(selected):
+    """
+    extracts the meta property of every selected point
+
+    Args:
+        selected (dict): selectedData of a chart
+
+    Returns:
+        list: player IDs
+    """
+    return [point['meta'] for point in selected.get('points', []) if 'meta' in point]
+
+def build_comparison_figure(frame, rows, percentiles, stats, chart_type, switch_on):
+    """
+    Build the comparison figure of the selected players for a stat group.
+
+    The radar draws each player's league percentiles so stats on different
+    scales share one axis; parallel coordinates keep the raw values, one
+    axis per stat.
+
+    Args:
+        frame (pd.DataFrame): chart frame the players' rows index into.
+        rows (np.ndarray): rows of the selected players in the frame.
+        percentiles (np.ndarray): league percentiles, one row per player and one column per stat.
+        stats (list): stats of the group.
+        chart_type (str): 'radar' or 'parallel'.
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        dict: The comparison figure as a JSON-compatible dict.
+    """
+    theme = chart_themes[bool(switch_on)]
+    labels = [format_stat_name(stat) for stat in stats]
+    values = frame[stats].to_numpy()[rows]
+    names = frame['name'].to_numpy()[rows]
+    teams = frame['team'].to_numpy()[rows]
+
+    # traces are plain dicts: one validated go trace per player would dominate the callback
+    if chart_type == 'parallel':
+        traces = [dict(
+            type='parcoords',
+            dimensions=[dict(label=label, values=values[:, i]) for i, label in enumerate(labels)],
+            line=dict(color=frame['team_code'].to_numpy()[rows], colorscale=team_colorscale, cmin=-0.5, cmax=len(team_codes)+0.5),
+            labelfont=dict(color=theme['font_color']), tickfont=dict(color=theme['font_color']))]
+        layout = {}
+    else:
+        theta = labels + labels[:1]
+        traces = [dict(
+            type='scatterpolar', r=np.append(player_percentiles, player_percentiles[0]), theta=theta,
+            customdata=np.append(player_values, player_values[0]), name=name, fill='toself', opacity=0.6,
+            line=dict(color=teams_color.get(team, default_team_color)),
+            hovertemplate=f'{name}<br>%{{theta}}: %{{customdata:.2f}} (%{{r:.0f}} pct)<extra></extra>')
+            for name, team, player_percentiles, player_values in zip(names, teams, percentiles * 100, values)]
+        layout = dict(polar=dict(bgcolor=theme['plot_bgcolor'], radialaxis=dict(range=[0, 100])))
+
+    load_chart_templates()
+    fig = go.Figure(layout=dict(layout, paper_bgcolor=theme['paper_bgcolor'], font_color=theme['font_color']))
+    return {**json.loads(fig.to_json()), 'data': traces}
+
+def create_comparison_callbacks(app, store):
+    """
+    Create the callbacks of the comparison panel.
+
+    The latest box or lasso selection on any chart is kept in a store, so the
+    stat group, chart type and theme can change without selecting again.
+    Every selected player is read with one batched gather over the season's
+    rank tables.
+
+    Args:
+        app (Dash): The Dash app instance.
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for updating the comparison chart.
+    """
+    @app.callback(
+        Output('comparison-selection', 'data'),
+        Input({'type': 'player-chart', 'position': ALL}, 'selectedData'),
+        prevent_initial_call=True)
+    def store_selection(selected_data):
+        selected = ctx.triggered[0]['value']
+        if not selected:
+            raise PreventUpdate
+        return {'position': ctx.triggered_id['position'], 'ids': get_selected_ids(selected)}
+
+    @app.callback(
+        Output('comparison-chart', 'figure'),
+        [Input('comparison-selection', 'data'),
+         Input('comparison-stat-group', 'value'),
+         Input('comparison-chart-type', 'value'),
+         Input('color-mode-switch', 'value')],
+        State('season-dropdown', 'value'),
+        prevent_initial_call=True)
+    @instrument_callback('update_comparison')
+    def update_comparison(selection, group, chart_type, switch_on, season):
+        if not selection or not selection['ids']:
+            raise PreventUpdate
+        with phase('load'):
+            dataset = store.get(season)
+            # selections on the teams chart are teams
+            position = team_tab if selection['position'] == team_tab.lower() else 'All Skaters'
+            stats = stat_groups[group]
+        with phase('gather'):
+            rows, percentiles = dataset.ranks(position).gather(selection['ids'], stats)
+        with phase('figure_build'):
+            return build_comparison_figure(dataset.frame(position), rows, percentiles, stats, chart_type, switch_on)
+    return update_comparison
+
+def create_tab_render_callback(app, tab_positions, stats_table_tab, stats, store):
+    """
+    Create a callback that renders a position tab's or the stats table tab's content the first time it is opened.
+
+    Tabs that were never opened stay empty, so their chart and table callbacks never run.
+
+    Args:
+        app (Dash): The Dash app instance.
+        tab_positions (dict): tab id -> position (e.g., 'A' -> 'All Skaters').
+        stats_table_tab (str): tab id of the stats table.
+        stats (list): List of statistics to display.
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for rendering tabs.
+    """
+    tab_ids = list(tab_positions) + [stats_table_tab]
+
+    @app.callback(
+        [Output(f'{position.lower()}-tab-body', 'children') for position in tab_positions.values()] +
+        [Output('stats-table-tab-body', 'children'),
+         Output('rendered-tabs', 'data')],
+        Input('position-tabs', 'active_tab'),
+        [State('rendered-tabs', 'data'),
+         State('season-dropdown', 'value'),
+         State('color-mode-switch', 'value')],
+        prevent_initial_call=True)
+    def render_active_tab(active_tab, rendered, season, switch_on):
+        rendered = rendered or []
+        if active_tab in rendered or active_tab not in tab_ids:
+            raise PreventUpdate
+        outputs = [no_update] * len(tab_ids)
+        if active_tab == stats_table_tab:
+            # the table's page callback runs once the table appears
+            outputs[-1] = html.Div(create_stats_table(stats), className='mt-4')
+        else:
+            outputs[tab_ids.index(active_tab)] = render_tab_content(app, tab_positions[active_tab], stats, store.get(season), switch_on)
+        return outputs + [rendered + [active_tab]]
+    return render_active_tab
+
+def render_tab_content(app, position, stats, dataset, switch_on=True):
+    """
+    Create a position tab's content for a season, with the top 100 players by points selected.
+
+    The chart and leaderboard come pre-filled with the season's precomputed
+    default view, so their callbacks do not run when the tab appears.
+
+    Args:
+        app (Dash): The Dash app instance.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+        stats (list): List of statistics to display.
+        dataset (Dataset): the season's data.
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        html.Div: The HTML content for the position tab.
+    """
+    top_players = dataset.top(position, 'I_F_points', 100)
+    figure, chart_state = get_default_chart(dataset, position, switch_on)
+    return create_tab_content(app, position, stats, top_players, get_player_options(dataset, position),
+                              figure, chart_state, get_leaderboard_rows(dataset, position, stats[0]))
+
+@lru_cache(maxsize=None)
+def get_stat_options(stats):
+    """
+    Return the stat dropdown options, built once per stat list and shared by every dropdown.
+
+    Args:
+        stats (tuple): statistics to offer.
+
+    Returns:
+        list: dropdown options with formatted stat names as labels
+    """
+    return [{'label': format_stat_name(stat), 'value': stat} for stat in stats]
+
+def get_player_options(dataset, position):
+    """
+    Return the player dropdown options of a position.
+
+    Args:
+        dataset (Dataset): the season's data.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+
+    Returns:
+        list: dropdown options with player names as labels and player IDs as values
+    """
+    names = dataset.position_column(position, 'name').tolist()
+    return [{'label': name, 'value': player_id} for player_id, name in zip(dataset.position_ids(position).tolist(), names)]
+
+def create_tab_content(app, position, stats, top_players, player_options, figure=None, chart_state=None, leaderboard=None):
     """
     Create the HTML content for each position tab.
 
     Args:
         position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
         stats (list): List of statistics to display.
-        top_players (list): List of top players' names.
-        df (pd.DataFrame): DataFrame containing the data for the position.
+        top_players (list): List of top players' IDs.
+        player_options (list): player dropdown options of the position from get_player_options.
+        figure (dict): initial chart figure, or None to leave it to the chart callback.
+        chart_state (dict): chart state of the initial figure.
+        leaderboard (list): initial leaderboard rows.
 
     Returns:
         html.Div: The HTML content for the position tab.
     """
+    stat_options = get_stat_options(tuple(stats))
     return html.Div([
         
         html.Div([
             html.H5('Y-axis Select:', className='mt-4'),
             dcc.Dropdown(
                 id=f'{position.lower()}-stat-dropdown-y',
-                options=[{'label': format_stat_name(stat), 'value': stat} for stat in stats],
+                options=stat_options,
                 value=stats[0],
                 optionHeight=50,
                 maxHeight=500,
@@ -269,12 +593,13 @@ def create_tab_content(app, position, stats, top_players, df):
         ], className='col-3'),
         html.Div([
             html.Div([
-                dcc.Graph(id=f'{position.lower()}-chart', className='mb-3', responsive=True, style=styles['graph'])
+                dcc.Graph(id=get_chart_id(position), className='mb-3', responsive=True, style=styles['graph'], **({'figure': figure} if figure else {})),
+                dcc.Store(id=f'{position.lower()}-chart-state', data=chart_state)
             ],className='mb-2', style={'height' : '550px'}),
             html.H5('X-axis Select:',className=''),
             dcc.Dropdown(
                 id=f'{position.lower()}-stat-dropdown-x',
-                options=[{'label': format_stat_name(stat), 'value': stat} for stat in stats],
+                options=stat_options,
                 value=stats[1],
                 style={'align-items':'left', 'justify-content':'center'},
                 className='btn w-75 mb-2',
@@ -282,63 +607,591 @@ def create_tab_content(app, position, stats, top_players, df):
             html.H5('Player Select:', className=''),
             dcc.Dropdown(
                 id=f'{position.lower()}-player-dropdown',
-                options=[{'label': player, 'value': player} for player in df['name'].unique()],
+                options=player_options,
                 value=top_players,
                 multi=True,
                 className='mb-3',
                 style={'padding': '10px'}
-            )
+            ),
+            html.H5('Top Players By:', className=''),
+            html.Div([
+                dcc.Dropdown(
+                    id=f'{position.lower()}-top-stat-dropdown',
+                    options=stat_options,
+                    placeholder='Select a stat',
+                    className='w-75 me-2'),
+                dcc.Dropdown(
+                    id=f'{position.lower()}-top-n-dropdown',
+                    options=[{'label': f'Top {n}', 'value': n} for n in top_n_options],
+                    value=100,
+                    clearable=False,
+                    className='w-25'),
+            ], className='d-flex mb-3', style={'padding': '10px'}),
+            html.H5('Leaderboard:', className=''),
+            dash_table.DataTable(
+                id=f'{position.lower()}-leaderboard',
+                columns=[
+                    {'name': 'Rank', 'id': 'rank', 'type': 'numeric'},
+                    {'name': 'Player', 'id': 'name'},
+                    {'name': 'Team', 'id': 'team'},
+                    {'name': 'Value', 'id': 'value', 'type': 'numeric'},
+                    {'name': 'Percentile', 'id': 'percentile', 'type': 'numeric'},
+                ],
+                data=leaderboard or [],
+                sort_action='native',
+                page_size=10,
+                style_table=styles['table'],
+                style_header={'fontWeight': 'bold'},
+                style_cell={'textAlign': 'left', 'backgroundColor': 'transparent'})
 
         ], className='col-9'),
         
     ], className="dash-bootstrap row")
 
-def create_player_callback(app, position, df):
+def get_chart_frame(df):
     """
-    Create a callback for updating player charts based on the selected stat and player(s).
+    Return the situation=='all' rows of a position keyed by playerId, in chart units.
+
+    Ice time and time on bench are converted to minutes once here instead of on every chart update.
+    Compact float32 stats are rounded back to their exact decimal values, so
+    charts and callbacks serialize the numbers of the data file.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the data for the position.
+
+    Returns:
+        pd.DataFrame: one row per player, indexed by playerId
+    """
+    frame = df[df['situation']=='all'].set_index('playerId')
+    compact_stats = [stat for stat in df.attrs.get('decimals', {}) if stat in frame.columns]
+    frame = pd.concat([frame.drop(columns=compact_stats), exact_values(frame, compact_stats)], axis=1)[frame.columns]
+    frame['icetime'] = round(frame['icetime']/60)
+    frame['timeOnBench'] = round(frame['timeOnBench']/60)
+    frame['team_code'] = np.asarray(frame['team'].map(team_codes), dtype='float64')
+    frame['team_code'] = frame['team_code'].fillna(len(team_codes)).astype('int16')
+    return frame
+
+def get_hover_template(selected_stat_x, selected_stat_y):
+    """
+    Return the scatter hover template for two stats.
+
+    Args:
+        selected_stat_x (str): The statistic on the x-axis.
+        selected_stat_y (str): The statistic on the y-axis.
+
+    Returns:
+        str: plotly hovertemplate
+    """
+    return '<b>%{text}</b>' + '<br>' + format_stat_name(selected_stat_x) + ' : %{x}'+ '<br>' + format_stat_name(selected_stat_y) + ' : %{y}'
+
+def get_chart_title(position, selected_stat_x, selected_stat_y):
+    """
+    Return the scatter title for two stats.
+
+    Args:
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D').
+        selected_stat_x (str): The statistic on the x-axis.
+        selected_stat_y (str): The statistic on the y-axis.
+
+    Returns:
+        str: chart title
+    """
+    return f'{position} - {format_stat_name(selected_stat_x)} vs {format_stat_name(selected_stat_y)}'
+
+def create_player_selection_callback(app, position, store):
+    """
+    Create a callback that fills a position's player dropdown for the selected season,
+    selecting the top N players by the chosen stat (points by default).
 
     Args:
         app (Dash): The Dash app instance.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for updating the player selection.
+    """
+    @app.callback(
+        [Output(f'{position.lower()}-player-dropdown', 'options'),
+         Output(f'{position.lower()}-player-dropdown', 'value')],
+        [Input('season-dropdown', 'value'),
+         Input(f'{position.lower()}-top-stat-dropdown', 'value'),
+         Input(f'{position.lower()}-top-n-dropdown', 'value'),
+         Input('view-sync', 'data')],
+        prevent_initial_call=True)
+    def select_top_players(season, stat, n, view_sync):
+        dataset = store.get(season)
+        options = get_player_options(dataset, position) if ctx.triggered_id in ('season-dropdown', 'view-sync') else no_update
+        return options, dataset.top(position, stat or 'I_F_points', n)
+    return select_top_players
+
+def create_leaderboard_callback(app, position, store):
+    """
+    Create a callback that lists the leaders of a position for the y-axis stat.
+
+    Leaders, ranks and percentiles all come from the season's precomputed tables.
+
+    Args:
+        app (Dash): The Dash app instance.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for updating the leaderboard.
+    """
+    @app.callback(
+        Output(f'{position.lower()}-leaderboard', 'data'),
+        [Input(f'{position.lower()}-stat-dropdown-y', 'value'),
+         Input('season-dropdown', 'value'),
+         Input('view-sync', 'data')],
+        prevent_initial_call=True)
+    def update_leaderboard(stat, season, view_sync):
+        return get_leaderboard_rows(store.get(season), position, stat)
+    return update_leaderboard
+
+def get_leaderboard_rows(dataset, position, stat):
+    """
+    Return the leaderboard rows of a position for a stat.
+
+    Args:
+        dataset (Dataset): the season's data.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+        stat (str): stat to rank by.
+
+    Returns:
+        list: rank, name, team, value and percentile of each leader
+    """
+    frame = dataset.frame(position)
+    ranks = dataset.ranks(position)
+    league = position in ('All Skaters', team_tab)
+    rows = []
+    for player_id in dataset.top(position, stat, leaderboard_rows):
+        rank = ranks.lookup(player_id, stat)
+        position_rank = rank['rank'] if league else rank['position_rank']
+        percentile = rank['percentile'] if league else rank['position_percentile']
+        value = frame.at[player_id, stat]
+        rows.append({
+            'rank': None if np.isnan(position_rank) else int(position_rank),
+            'name': frame.at[player_id, 'name'],
+            'team': frame.at[player_id, 'team'],
+            'value': None if np.isnan(value) else round(float(value), 2),
+            'percentile': None if np.isnan(percentile) else round(float(percentile) * 100, 1),
+        })
+    return rows
+
+def create_stats_table(stats):
+    """
+    Create the full stats table, paged, sorted and filtered on the server.
+
+    Args:
+        stats (list): List of statistics to display.
+
+    Returns:
+        dash_table.DataTable: empty table whose pages are filled by create_stats_table_callback
+    """
+    columns = [{'name': col.title(), 'id': col} for col in stats_table_text_columns]
+    columns += [{'name': format_stat_name(stat), 'id': stat, 'type': 'numeric'} for stat in stats]
+    return dash_table.DataTable(
+        id='stats-table',
+        columns=columns,
+        page_current=0,
+        page_size=stats_table_page_size,
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='single',
+        filter_action='custom',
+        filter_query='',
+        fixed_columns={'headers': True, 'data': 1},
+        style_table={**styles['table'], 'minWidth': '100%', 'overflowX': 'auto'},
+        style_header={'fontWeight': 'bold', 'whiteSpace': 'normal', 'height': 'auto'},
+        style_cell={'textAlign': 'left', 'backgroundColor': 'transparent', 'minWidth': '90px'})
+
+def create_stats_table_callback(app, store):
+    """
+    Create a callback that sends the stats table only the rows of its current page.
+
+    Args:
+        app (Dash): The Dash app instance.
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The callback function for updating the stats table.
+    """
+    @app.callback(
+        [Output('stats-table', 'data'),
+         Output('stats-table', 'page_count')],
+        [Input('stats-table', 'page_current'),
+         Input('stats-table', 'page_size'),
+         Input('stats-table', 'sort_by'),
+         Input('stats-table', 'filter_query'),
+         Input('season-dropdown', 'value')])
+    def update_stats_table(page_current, page_size, sort_by, filter_query, season):
+        records, total = store.get(season).stats_table.page(page_current, page_size, sort_by, filter_query)
+        return records, max(1, -(-total // page_size))
+    return update_stats_table
+
+@lru_cache(maxsize=None)
+def load_chart_templates():
+    """
+    Register the figure templates, once, on the first server-side figure build.
+    """
+    load_figure_template(figure_templates)
+
+@lru_cache(maxsize=None)
+def get_figure_template():
+    """
+    Return the default figure template as a JSON-compatible dict, built once.
+
+    Returns:
+        dict: the template every server-built figure carries in its layout
+    """
+    load_chart_templates()
+    return json.loads(go.Figure().to_json())['layout']['template']
+
+def get_json_values(values):
+    """
+    Return a column as a list for a figure, with NaN as None.
+
+    Args:
+        values (pd.Series): column values.
+
+    Returns:
+        list: the values, None where missing
+    """
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def build_player_figure(position, frame, selected_stat_x, selected_stat_y, selected_players, switch_on):
+    """
+    Build the scatter figure of the selected players for two stats.
+
+    Above scattergl_threshold points the chart is drawn with WebGL. Marker
+    colors are team codes on a discrete colorscale in both modes. The figure
+    is assembled as a dict, skipping plotly's per-property validation.
+
+    Args:
         position (str): The position (e.g., 'C', 'RW', 'LW', 'D').
-        df (pd.DataFrame): DataFrame containing the data for the position.
+        frame (pd.DataFrame): chart frame from get_chart_frame.
+        selected_stat_x (str): The statistic on the x-axis.
+        selected_stat_y (str): The statistic on the y-axis.
+        selected_players (list): The selected players' IDs.
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        dict: The scatter figure as a JSON-compatible dict.
+    """
+    with phase('filter'):
+        filtered_df = frame[frame.index.isin(selected_players)]
+    theme = chart_themes[bool(switch_on)]
+
+    with phase('transform'):
+        marker = dict(color=filtered_df['team_code'].tolist(), colorscale=team_colorscale, cmin=-0.5, cmax=len(team_codes)+0.5, showscale=False, line=dict(width=1), size=10)
+        trace = dict(
+            type='scattergl' if len(filtered_df) > scattergl_threshold else 'scatter', mode='markers', name='',
+            meta=filtered_df.index.tolist(), text=filtered_df['name'].tolist(),
+            x=get_json_values(filtered_df[selected_stat_x]), y=get_json_values(filtered_df[selected_stat_y]),
+            marker=marker, hovertemplate=get_hover_template(selected_stat_x, selected_stat_y))
+
+    with phase('figure_build'):
+        font = dict(color=theme['font_color'])
+        layout = dict(
+            template=get_figure_template(),
+            title=dict(text=get_chart_title(position, selected_stat_x, selected_stat_y), font=font),
+            plot_bgcolor=theme['plot_bgcolor'], paper_bgcolor=theme['paper_bgcolor'],
+            xaxis=dict(title=dict(text=format_stat_name(selected_stat_x), font=font)),
+            yaxis=dict(title=dict(text=format_stat_name(selected_stat_y), font=font)))
+        return {'data': [trace], 'layout': layout}
+
+def patch_player_figure(position, frame, state, triggered_id, selected_stat_x, selected_stat_y, selected_players, switch_on):
+    """
+    Return a Patch that moves the rendered figure from its previous state to the new inputs.
+
+    Only the arrays or layout properties touched by the changed input are sent:
+    players added or removed edit the point arrays, an axis change swaps one axis,
+    and the color-mode switch only recolors the layout.
+
+    Args:
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D').
+        frame (pd.DataFrame): chart frame from get_chart_frame.
+        state (dict): players (in figure order), x, y and theme of the rendered figure.
+        triggered_id (str): id of the input that changed.
+        selected_stat_x (str): The statistic on the x-axis.
+        selected_stat_y (str): The statistic on the y-axis.
+        selected_players (list): The selected players' IDs.
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        Patch, dict: the figure patch and the new chart state
+    """
+    patch = Patch()
+    trace = patch['data'][0]
+    players = state['players']
+    prefix = position.lower()
+
+    if triggered_id == f'{prefix}-player-dropdown':
+        selected = set(selected_players)
+        kept = set(players)
+        removed = [i for i, player_id in enumerate(players) if player_id not in selected]
+        added = [player_id for player_id in dict.fromkeys(selected_players) if player_id not in kept and player_id in frame.index]
+        for i in reversed(removed):
+            for field in ('x', 'y', 'meta', 'text'):
+                del trace[field][i]
+            del trace['marker']['color'][i]
+        if added:
+            rows = frame.loc[added]
+            trace['x'].extend(rows[selected_stat_x].tolist())
+            trace['y'].extend(rows[selected_stat_y].tolist())
+            trace['meta'].extend(added)
+            trace['text'].extend(rows['name'].tolist())
+            trace['marker']['color'].extend(rows['team_code'].tolist())
+        players = [player_id for player_id in players if player_id in selected] + added
+
+    elif triggered_id in (f'{prefix}-stat-dropdown-x', f'{prefix}-stat-dropdown-y'):
+        axis, stat = ('x', selected_stat_x) if triggered_id.endswith('-x') else ('y', selected_stat_y)
+        trace[axis] = frame.loc[players, stat].tolist()
+        trace['hovertemplate'] = get_hover_template(selected_stat_x, selected_stat_y)
+        patch['layout'][f'{axis}axis']['title']['text'] = format_stat_name(stat)
+        patch['layout']['title']['text'] = get_chart_title(position, selected_stat_x, selected_stat_y)
+
+    else:
+        theme = chart_themes[bool(switch_on)]
+        patch['layout']['plot_bgcolor'] = theme['plot_bgcolor']
+        patch['layout']['paper_bgcolor'] = theme['paper_bgcolor']
+        patch['layout']['title']['font']['color'] = theme['font_color']
+        patch['layout']['xaxis']['title']['font']['color'] = theme['font_color']
+        patch['layout']['yaxis']['title']['font']['color'] = theme['font_color']
+
+    return patch, {**state, 'players': players, 'x': selected_stat_x, 'y': selected_stat_y, 'theme': bool(switch_on)}
+
+def create_player_callback(app, position, store, response_cache):
+    """
+    Create a callback for updating player charts based on the selected season, stat and player(s).
+
+    Args:
+        app (Dash): The Dash app instance.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D').
+        store (SeasonStore): store of every season's data.
+        response_cache (ResponseCache): cache of previously built callback responses.
 
     Returns:
         function: The callback function for updating the chart.
     """
+    prefix = position.lower()
+
     @app.callback(
-        Output(f'{position.lower()}-chart', 'figure'),
-        [Input(f'{position.lower()}-stat-dropdown-x', 'value'),
-         Input(f'{position.lower()}-stat-dropdown-y', 'value'),
-         Input(f'{position.lower()}-player-dropdown', 'value'),
-         Input("color-mode-switch", "value")],
+        [Output(get_chart_id(position), 'figure'),
+         Output(f'{prefix}-chart-state', 'data')],
+        [Input(f'{prefix}-stat-dropdown-x', 'value'),
+         Input(f'{prefix}-stat-dropdown-y', 'value'),
+         Input(f'{prefix}-player-dropdown', 'value'),
+         Input("color-mode-switch", "value"),
+         Input('season-dropdown', 'value'),
+         Input('view-sync', 'data')],
+        State(f'{prefix}-chart-state', 'data'),
+        # tabs arrive with their default figure already drawn
+        prevent_initial_call=True,
     )
-    def update_chart(selected_stat_x, selected_stat_y, selected_players, switch_on):
-        """assets
+    @instrument_callback(f'update_chart_{prefix}')
+    def update_chart(selected_stat_x, selected_stat_y, selected_players, switch_on, season, view_sync, state):
+        """
         Update the player chart based on the selected stat and player(s).
 
+        A single changed input on an already rendered chart is sent as a Patch,
+        unless it moves the chart across the WebGL threshold; anything else
+        rebuilds the figure, served from the response cache when any worker
+        built the same view before.
+
         Args:
-            selected_stat (str): The selected statistic to display.
-            selected_players (list): The selected players' names.
+            selected_stat_x (str): The statistic on the x-axis.
+            selected_stat_y (str): The statistic on the y-axis.
+            selected_players (list): The selected players' IDs.
+            switch_on (bool): Whether dark mode is on.
+            season (int): The selected season.
+            view_sync (int): set when the browser restored a season or theme other than the page was built with.
+            state (dict): season, data version, players, axes and theme of the rendered figure.
 
         Returns:
-            plotly.graph_objs._figure.Figure: The updated line chart figure.
+            dict: The updated scatter figure or a Patch, and the new chart state.
         """
-        dbc.Label(className="Player_Stats_Scatter", html_for="scatter")
-        filtered_df = df[df['name'].isin(selected_players)]
-        filtered_df = filtered_df[filtered_df['situation']=='all']
-        filtered_df.icetime = round(filtered_df.icetime/60)
-        filtered_df.timeOnBench = round(filtered_df.timeOnBench/60)
-
-        hover_template = '<b>%{meta}</b>' + '<br>' + format_stat_name(selected_stat_x) + ' : %{x}'+ '<br>' + format_stat_name(selected_stat_y) + ' : %{y}'
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(meta=filtered_df.name, x=filtered_df[selected_stat_x], y=filtered_df[selected_stat_y], mode='markers', marker_color=filtered_df['team'].map(teams_color)))
-        fig.update_layout(title=f'{position} - {format_stat_name(selected_stat_x)} vs {format_stat_name(selected_stat_y)}', plot_bgcolor= '#343A40', paper_bgcolor= '#2B3035', title_font_color='#c9c9c9')
-        fig.update_traces(hovertemplate = hover_template)
-        fig.update_traces(marker_line_width=1, marker_size=10, name="")
-        fig.update_yaxes(title_text=format_stat_name(selected_stat_y), title_font_color='#c9c9c9')
-        fig.update_xaxes(title_text=format_stat_name(selected_stat_x), title_font_color='#c9c9c9')
+        with phase('load'):
+            dataset = store.get(season)
+            # players are picked by ID, so every position charts from the one shared frame (teams from their rollups)
+            frame = dataset.frame(position)
+        selected_players = selected_players or []
+        use_gl = len(selected_players) > scattergl_threshold
+        if state and len(ctx.triggered) == 1 and ctx.triggered_id not in (None, 'view-sync') and state['players'] and state.get('gl') == use_gl and state.get('season') == dataset.season and state.get('version') == dataset.version:
+            with phase('patch'):
+                return patch_player_figure(position, frame, state, ctx.triggered_id, selected_stat_x, selected_stat_y, selected_players, switch_on)
 
-        
-        return fig
-    return update_chart
\ No newline at end of file
+        with phase('cache_key'):
+            key = make_key(f'update_chart_{prefix}', dataset.version, selected_stat_x, selected_stat_y, selected_players, bool(switch_on))
+        figure = response_cache.get_or_build(f'update_chart_{prefix}', key, lambda: build_player_figure(position, frame, selected_stat_x, selected_stat_y, selected_players, switch_on))
+        return figure, get_chart_state(dataset, figure, selected_stat_x, selected_stat_y, switch_on)
+    return update_chart
+
+def get_chart_state(dataset, figure, selected_stat_x, selected_stat_y, switch_on):
+    """
+    Return the chart state describing a rendered figure, which later updates patch.
+
+    Args:
+        dataset (Dataset): the season's data.
+        figure (dict): the rendered figure.
+        selected_stat_x (str): The statistic on the x-axis.
+        selected_stat_y (str): The statistic on the y-axis.
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        dict: season, data version, players, axes, theme and WebGL flag of the figure
+    """
+    trace = figure['data'][0]
+    return {'season': dataset.season, 'version': dataset.version, 'players': trace.get('meta', []), 'x': selected_stat_x, 'y': selected_stat_y, 'theme': bool(switch_on), 'gl': trace['type'] == 'scattergl'}
+
+def build_default_figures(dataset, positions):
+    """
+    Build the default figure of every chart of a season, in both color modes.
+
+    The default view is the top 100 players by points with the first two
+    chart stats. Figures are kept as gzip-compressed JSON.
+
+    Args:
+        dataset (Dataset): the season's data.
+        positions (list): positions with a chart (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+
+    Returns:
+        dict: (position, dark mode) -> compressed figure JSON
+    """
+    figures = {}
+    for position in positions:
+        players = dataset.top(position, 'I_F_points', 100)
+        for switch_on in (True, False):
+            figure = build_player_figure(position, dataset.frame(position), chart_stats[1], chart_stats[0], players, switch_on)
+            figures[(position, switch_on)] = gzip.compress(json.dumps(figure, separators=(',', ':')).encode())
+    return figures
+
+def get_default_chart(dataset, position, switch_on):
+    """
+    Return a position's precomputed default figure and its chart state.
+
+    Args:
+        dataset (Dataset): the season's data.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters').
+        switch_on (bool): Whether dark mode is on.
+
+    Returns:
+        dict: figure, dict: chart state
+    """
+    figure = json.loads(gzip.decompress(dataset.default_figures[(position, bool(switch_on))]))
+    return figure, get_chart_state(dataset, figure, chart_stats[1], chart_stats[0], switch_on)
+
+def encode_column(values, dtype='<f4'):
+    """
+    Encode a numeric column as base64 little-endian floats for a browser Float32Array or Float64Array.
+
+    Args:
+        values (array-like): column values.
+        dtype (str): '<f4' or '<f8'.
+
+    Returns:
+        str: base64 encoded float bytes
+    """
+    return base64.b64encode(np.asarray(values, dtype=dtype).tobytes()).decode()
+
+def get_frame_payload(frame):
+    """
+    Return the columnar copy of a chart frame that the browser builds charts from.
+
+    Stats that a float32 copy rounded to a few decimals restores exactly are
+    sent as float32 with their decimals, so the browser rounds them back to
+    the values the server charts; any other stat is sent as float64.
+
+    Args:
+        frame (pd.DataFrame): chart frame from get_chart_frame.
+
+    Returns:
+        dict: ids, names and team codes, every stat base64 encoded, and the decimals of the float32 stats
+    """
+    decimals = get_stat_decimals(frame, chart_stats, compact_max_decimals)
+    return {
+        'ids': frame.index.tolist(),
+        'names': frame['name'].tolist(),
+        'teams': frame['team_code'].tolist(),
+        'stats': {stat: encode_column(frame[stat], '<f4' if stat in decimals else '<f8') for stat in chart_stats},
+        'decimals': decimals,
+    }
+
+def build_chart_payload(dataset, positions):
+    """
+    Return the season payload every clientside chart is drawn from.
+
+    Players are picked by ID, so every position tab charts from the one
+    skater frame, as on the server; the teams tab has its own frame.
+
+    Args:
+        dataset (Dataset): the season's data.
+        positions (list): positions with a chart (e.g., 'C', 'RW', 'LW', 'D', 'All Skaters', 'Teams').
+
+    Returns:
+        dict: skater and team frames, the frame and title of each chart, and chart settings
+    """
+    return {
+        'frames': {'players': get_frame_payload(dataset.chart_frame), 'teams': get_frame_payload(dataset.team_frame)},
+        'charts': {position.lower(): {'frame': 'teams' if position == team_tab else 'players', 'title': position} for position in positions},
+        'labels': {stat: format_stat_name(stat) for stat in chart_stats},
+        'themes': {'dark': chart_themes[True], 'light': chart_themes[False]},
+        'colorscale': team_colorscale,
+        'cmax': len(team_codes) + 0.5,
+        'glThreshold': scattergl_threshold,
+    }
+
+def create_chart_data_callback(app, store):
+    """
+    Serve each season's chart payload from /chart-data/<season>.json and load it into the browser.
+
+    The payload is served pre-serialized, gzip-compressed and with an ETag,
+    like the layout, so a returning visitor revalidates it with a 304
+    instead of downloading it again.
+
+    Args:
+        app (Dash): The Dash app instance.
+        store (SeasonStore): store of every season's data.
+
+    Returns:
+        function: The route serving the chart data.
+    """
+    @app.server.route('/chart-data/<int:season>.json')
+    def chart_data(season):
+        try:
+            payload = store.get(season).chart_payload
+        except KeyError:
+            flask.abort(404)
+        return payload_response(payload)
+
+    clientside_callback(
+        ClientsideFunction(namespace='charts', function_name='load'),
+        Output('chart-data', 'data'),
+        Input('season-dropdown', 'value'),
+    )
+    return chart_data
+
+def create_clientside_player_callback(app, position):
+    """
+    Create the clientside alternative to create_player_callback.
+
+    Axis, player and theme changes are rendered in the browser by
+    assets/charts.js from the season payload of create_chart_data_callback.
+
+    Args:
+        app (Dash): The Dash app instance.
+        position (str): The position (e.g., 'C', 'RW', 'LW', 'D').
+    """
+    prefix = position.lower()
+
+    clientside_callback(
+        ClientsideFunction(namespace='charts', function_name='scatter'),
+        Output(get_chart_id(position), 'figure'),
+        [Input(f'{prefix}-stat-dropdown-x', 'value'),
+         Input(f'{prefix}-stat-dropdown-y', 'value'),
+         Input(f'{prefix}-player-dropdown', 'value'),
+         Input("color-mode-switch", "value"),
+         Input('chart-data', 'data')],
+        State(get_chart_id(position), 'id'),
+    )